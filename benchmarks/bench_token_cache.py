@@ -0,0 +1,77 @@
+'''
+签名缓存TokenCache的微基准测试
+
+比较缓存开启(默认)和关闭(maxsize=0)时，为一个请求生成Authorization值的耗时：
+    python benchmarks/bench_token_cache.py [-n 20000] [-r 5]
+'''
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pyharbor
+from pyharbor import request
+
+
+URL = 'https://obs.casearth.cn/api/v1/obj/bucket/dir/中文 对象.bin/'
+
+
+def case_upload_chunks():
+    '''同一对象的分片上传，偏移量在请求体中，路径相同'''
+    auth = request.get_auth()
+    return lambda: auth.get_auth_header_value(method='POST', url=URL, params=None)
+
+
+def case_download_chunks():
+    '''分片下载，每个分片的偏移量在查询参数中，路径各不相同'''
+    auth = request.get_auth()
+    counter = iter(range(10**9))
+    return lambda: auth.get_auth_header_value(method='GET', url=URL,
+                                              params={'offset': next(counter) * 5242880, 'size': 5242880})
+
+
+def case_walk():
+    '''遍历大量不同的目录和对象路径，每个路径只访问一次'''
+    auth = request.get_auth()
+    counter = iter(range(10**9))
+    return lambda: auth.get_auth_header_value(method='GET', url=URL + str(next(counter)) + '/', params=None)
+
+
+CASES = [
+    ('POST same object (chunk upload)', case_upload_chunks),
+    ('GET offset/size params (chunk download)', case_download_chunks),
+    ('GET unique paths (walk)', case_walk),
+]
+
+
+def bench(make, number, repeat, maxsize):
+    request.token_cache.maxsize = maxsize
+    best = None
+    for _ in range(repeat):
+        request.token_cache.clear()
+        t = timeit.timeit(make(), number=number)
+        best = t if best is None else min(best, t)
+    return best / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--number', type=int, default=20000, help='每轮调用次数')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='轮数，取最快的一轮')
+    args = parser.parse_args()
+
+    pyharbor.set_global_settings({})
+    pyharbor.set_global_auth_key(access_key='bench-access-key', secret_key='bench-secret-key')
+    maxsize = request.token_cache.maxsize
+    print('{0:<42}{1:>14}{2:>14}'.format('case (us per request)', 'no cache', 'cache'))
+    for name, make in CASES:
+        off = bench(make, args.number, args.repeat, maxsize=0)
+        on = bench(make, args.number, args.repeat, maxsize=maxsize)
+        print('{0:<42}{1:>14.1f}{2:>14.1f}'.format(name, off, on))
+    request.token_cache.maxsize = maxsize
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,14 @@
 from .config import set_global_auth_key, set_global_settings, configs
 from .api import Client, Directory
-from .core import ApiCore
+from .core import ApiCore, AdaptiveChunkSize
+from .request import HarborSession
+from .journal import UploadJournal
+from .retry import RetryPolicy
+from .deadline import Deadline, DeadlineExceeded
+from .reader import HarborObjectReader
+from .listing import CompactListing
+from .cache import MetadataCache, BucketIdCache, DirectoryCache
+from .aio import AsyncClient, AsyncApiCore
 
 
 def get_client():
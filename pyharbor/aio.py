@@ -0,0 +1,1384 @@
+import asyncio
+import json
+import os
+
+from requests.exceptions import ConnectionError, Timeout
+
+from .config import configs, join_url_with_slash
+from .core import ApiUrlBuilder, get_response_msg, get_path_breadcrumb, write_at
+from .multipart import ChunkFormData
+from .request import get_auth, prepare_url, get_default_timeout
+from .deadline import Deadline, DeadlineExceeded
+from .retry import RetryPolicy
+from .cache import BucketIdCache, DirectoryCache
+from .api import get_path_and_name
+
+
+def _import_aiohttp():
+    '''
+    aiohttp为可选依赖，只有使用异步客户端时才需要安装
+    '''
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError('pyharbor.aio requires aiohttp, please install it: pip install aiohttp') from None
+
+    return aiohttp
+
+
+class AsyncResponse():
+    '''
+    已读取响应体的异步请求响应，提供与requests.Response相同的status_code、headers、content、ok、text、json()
+    '''
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def __str__(self):
+        return '<AsyncResponse [{0}]>'.format(self.status_code)
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+async def aiter_completed(fn, items, max_in_flight):
+    '''
+    并发执行协程任务，同时进行的任务数不超过max_in_flight，按任务完成的顺序返回结果；
+    生成器被关闭时未完成的任务会被取消
+
+    :param fn: 协程函数，参数为items中的一项
+    :param items: 任务参数的异步迭代器
+    :param max_in_flight: 同时进行的任务数上限
+    :return:
+        (item, result)
+    '''
+    pending = {}
+    items = items.__aiter__()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    item = await items.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending[asyncio.ensure_future(fn(item))] = item
+
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield pending.pop(task), task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _aiter(items):
+    '''
+    可迭代对象或异步可迭代对象转为异步迭代器
+    '''
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def file_offset_chunks(filename, offset=0, chunk_size=5*1024**2):
+    '''
+    在线程池中读取文件，不阻塞事件循环，yield (offset, chunk)
+
+    :param filename: 文件路径
+    :param offset: 开始读取的偏移量
+    :param chunk_size: 分片大小
+    '''
+    loop = asyncio.get_running_loop()
+    with open(filename, 'rb') as f:
+        f.seek(offset)
+        while True:
+            chunk = await loop.run_in_executor(None, f.read, chunk_size)
+            if not chunk:
+                break
+
+            yield offset, chunk
+            offset += len(chunk)
+
+
+async def bytes_offset_chunks(data, offset=0, chunk_size=5*1024**2):
+    '''
+    内存中数据的分片，分片为memoryview切片，不拷贝数据，yield (offset, chunk)
+
+    :param data: bytes、bytearray或memoryview
+    :param offset: 第一个分片的偏移量
+    :param chunk_size: 分片大小
+    '''
+    view = memoryview(data).cast('B')
+    for i in range(0, len(view), chunk_size):
+        chunk = view[i:i + chunk_size]
+        yield offset, chunk
+        offset += len(chunk)
+
+
+async def _iter_body(body):
+    for piece in body:
+        yield piece
+
+
+class AsyncApiCore():
+    '''
+    EVHarbor API 的asyncio异步封装，与ApiCore的接口和返回值一致；
+    大量小对象传输时由一个事件循环并发进行，不需要每个请求一个线程
+
+    基于aiohttp，需要在协程中使用，使用完毕后调用await close()关闭连接池
+    '''
+    def __init__(self, session=None, limit=None, retry=None):
+        '''
+        :param session: aiohttp.ClientSession，默认在第一次请求时新建一个此对象独占的会话
+        :param limit: 新建会话时连接池的最大连接数，即同时进行的请求数上限，默认configs.AIO_LIMIT
+        :param retry: 所有请求使用的重试策略RetryPolicy，默认RetryPolicy()；RetryPolicy(max_attempts=1)为不重试
+        '''
+        self._aiohttp = _import_aiohttp()
+        self._url_builder = ApiUrlBuilder()
+        self._own_session = session is None
+        self._session = session
+        self.limit = limit or configs.AIO_LIMIT or 100
+        self.retry = retry or RetryPolicy()
+        self._errors = (self._aiohttp.ClientError, asyncio.TimeoutError)
+        self.bucket_ids = BucketIdCache()       # 存储桶名称到id的映射
+        self._bucket_ids_lock = None
+        self.dir_cache = DirectoryCache()       # 已知存在的目录
+
+    @property
+    def session(self):
+        if self._session is None:
+            connector = self._aiohttp.TCPConnector(limit=self.limit)
+            self._session = self._aiohttp.ClientSession(connector=connector)
+
+        return self._session
+
+    async def close(self):
+        '''
+        关闭此对象独占的连接池会话
+        '''
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(self, method, url, params=None, data=None, headers=None, deadline=None, idempotent=None):
+        '''
+        发送一个带安全凭证的请求，读取整个响应体；连接和读取超时默认configs.CONNECT_TIMEOUT、configs.READ_TIMEOUT
+
+        :param method: 请求方法
+        :param url: url
+        :param params: 查询参数
+        :param data: 请求体，bytes、dict(表单)或ChunkFormData；重试时重新发送
+        :param headers: 请求头
+        :param deadline: 截止时间，Deadline()或者秒数，请求和重试共享剩余时间
+        :param idempotent: 请求是否可以重复发送，默认由重试策略按请求方法判断，POST、PATCH不重试
+        :return:
+            AsyncResponse()
+        :raises aiohttp.ClientError, asyncio.TimeoutError: 网络错误
+        :raises DeadlineExceeded: 已超过截止时间
+        '''
+        from yarl import URL
+
+        url, path_url = prepare_url(url=url, params=params)
+        url = URL(url, encoded=True)    # url已编码，不再重新编码，保证请求的路径与签名的路径一致
+        headers = dict(headers or {})
+        headers['Authorization'] = get_auth().get_auth_header_value_by_path(method=method, path_url=path_url)
+        deadline = Deadline.make(deadline)
+
+        retry = self.retry if (self.retry.is_idempotent(method) if idempotent is None else idempotent) else None
+        if retry is not None:
+            retry.new_request()
+        attempt = 0
+        while True:
+            attempt += 1
+            body = _iter_body(data) if isinstance(data, ChunkFormData) else data
+            try:
+                async with self.session.request(method, url, data=body, headers=headers,
+                                                timeout=self._timeout(deadline)) as r:
+                    content = await r.read()
+                    response = AsyncResponse(status_code=r.status, headers=r.headers, content=content)
+            except self._errors as e:
+                delay = None if retry is None else retry.get_delay(attempt, exception=self._as_retry_exception(e))
+                if delay is None:
+                    raise
+                if deadline is not None and delay >= deadline.remaining():
+                    raise deadline._exceeded() from e
+            else:
+                delay = None if retry is None else retry.get_delay(attempt, response=response)
+                if delay is None or (deadline is not None and delay >= deadline.remaining()):
+                    return response
+
+            await asyncio.sleep(delay)
+
+    def _timeout(self, deadline=None):
+        '''
+        请求的超时设置，连接和读取超时不超过截止时间的剩余时间
+
+        :raises DeadlineExceeded: 已超过截止时间
+        '''
+        connect, read = get_default_timeout()
+        total = None
+        if deadline is not None:
+            connect, read = deadline.timeout((connect, read))
+            total = deadline.remaining()
+
+        return self._aiohttp.ClientTimeout(total=total, sock_connect=connect, sock_read=read)
+
+    def _as_retry_exception(self, e):
+        '''
+        aiohttp的网络错误和超时对应到requests的异常类型，由重试策略判断是否重试
+        '''
+        if isinstance(e, asyncio.TimeoutError):
+            return Timeout(str(e))
+        elif isinstance(e, (self._aiohttp.ClientConnectionError, self._aiohttp.ClientPayloadError)):
+            return ConnectionError(str(e))
+
+        return e
+
+    def _invalidate_dir(self, bucket_name, path):
+        '''
+        上传或列举时目录不存在，目录可能已被其他客户端删除，使其及其子目录的缓存失效，之后的create_path()重新创建
+
+        :param path: 目录路径
+        '''
+        self.dir_cache.invalidate(bucket_name, path, recursive=True)
+
+    async def upload_one_chunk(self, obj_url, offset, chunk, deadline=None):
+        '''
+        上传一个分片
+
+        :param obj_url: 对象url
+        :param offset: 分片偏移量
+        :param chunk: 分片，bytes、memoryview或者二进制方式打开的文件描述符
+        :param deadline: 截止时间，Deadline()或者秒数
+        :return:
+            success: (True, code, msg)
+            failure: (False, code, msg)
+            可能参数有误，目录路径不存在等各种原因不具备上传条件: (None, 0, msg)
+        '''
+        body = ChunkFormData(offset=offset, chunk=chunk)
+        headers = {'Content-Type': body.content_type, 'Content-Length': str(len(body))}
+        try:
+            # 分片按偏移量写入，重复发送的结果相同，可以重试
+            r = await self.request('post', obj_url, data=body, headers=headers, deadline=deadline, idempotent=True)
+        except self._errors + (DeadlineExceeded,) as e:
+            return (False, 0, str(e))
+
+        msg = get_response_msg(r)
+
+        if r.status_code == 200:
+            return (True, 200, msg)
+        elif 400 <= r.status_code < 500:
+            return (None, r.status_code, msg)
+
+        return False, r.status_code, msg
+
+    async def write_one_chunk(self, bucket_name, path, obj_name, offset, chunk, deadline=None):
+        '''
+        上传一个分片
+
+        :param bucket_name: 桶
+        :param path:  对象所在目录路径
+        :param obj_name: 对象名称
+        :param offset: 分片偏移量
+        :param chunk: 分片，bytes、memoryview或者二进制方式打开的文件描述符
+        :param deadline: 截止时间，Deadline()或者秒数
+        :return:
+            同upload_one_chunk()
+        '''
+        obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
+        result = await self.upload_one_chunk(obj_url=obj_url, offset=offset, chunk=chunk, deadline=deadline)
+        if result[1] == 404:
+            self._invalidate_dir(bucket_name, path)
+        return result
+
+    async def _upload_chunks(self, obj_url, items, start=0, workers=1, deadline=None):
+        '''
+        并发上传分片，同时上传的分片数不超过workers
+
+        :param obj_url: 对象url
+        :param items: 分片异步迭代器，依次返回从start开始连续的(offset, chunk)
+        :param start: 开始上传的偏移量
+        :param workers: 同时上传的分片数
+        :param deadline: 截止时间Deadline()
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示上传是否成功
+            offset: 从start开始连续上传成功的偏移量，可以从此偏移量续传
+            msg: 上传结果描述字符串
+        '''
+        committed = start   # 从start开始连续上传成功的偏移量
+        acked = {}          # 已上传成功但与committed不连续的分片, {offset: end}
+
+        async def upload(item):
+            offset, chunk = item
+            return await self.upload_one_chunk(obj_url=obj_url, offset=offset, chunk=chunk, deadline=deadline)
+
+        results = aiter_completed(upload, items, max_in_flight=max(workers, 1))
+        try:
+            async for (offset, chunk), (ok, code, msg) in results:
+                if not ok:
+                    return False, committed, 'upload failed:' + msg
+
+                acked[offset] = offset + len(chunk)
+                while committed in acked:
+                    committed = acked.pop(committed)
+        finally:
+            await results.aclose()
+
+        return True, committed, 'upload successfull'
+
+    async def upload_obj_by_url(self, obj_url, filename, start=0, workers=1, chunk_size=5*1024**2, deadline=None):
+        '''
+        上传一个文件
+
+        :param obj_url: 对象url
+        :param filename: 要上传文件的绝对路径
+        :param start: 开始上传的偏移量
+        :param workers: 同时上传的分片数
+        :param chunk_size: 分片大小
+        :param deadline: 整个上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时上传失败，返回的offset可以用于续传
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示上传是否成功
+            offset: 从start开始连续上传成功的偏移量
+            msg: 上传结果描述字符串
+        '''
+        if not os.path.exists(filename):
+            raise FileNotFoundError()
+
+        items = file_offset_chunks(filename, offset=start, chunk_size=chunk_size)
+        return await self._upload_chunks(obj_url=obj_url, items=items, start=start, workers=workers,
+                                         deadline=Deadline.make(deadline))
+
+    async def upload_obj(self, bucket_name, path, obj_name, filename, start=0, workers=1, chunk_size=5*1024**2,
+                         deadline=None):
+        '''
+        上传一个文件
+
+        :param bucket_name: 存储桶名称
+        :param path: 目录路径
+        :param obj_name: 对象名称
+        :param filename: 要上传文件的绝对路径
+        :param start: 开始上传的偏移量
+        :param workers: 同时上传的分片数
+        :param chunk_size: 分片大小
+        :param deadline: 整个上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时上传失败，返回的offset可以用于续传
+        :return:
+            (ok, offset, msg)
+        '''
+        obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
+        result = await self.upload_obj_by_url(obj_url=obj_url, filename=filename, start=start, workers=workers,
+                                              chunk_size=chunk_size, deadline=deadline)
+        if not result[0]:
+            self._invalidate_dir(bucket_name, path)
+        return result
+
+    async def upload_bytes_by_url(self, obj_url, data, start=0, workers=1, chunk_size=5*1024**2, deadline=None):
+        '''
+        上传内存中的数据
+
+        :param obj_url: 对象url
+        :param data: bytes、bytearray或memoryview
+        :param start: 数据写入对象的起始偏移量
+        :param workers: 同时上传的分片数
+        :param chunk_size: 分片大小
+        :param deadline: 整个上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时上传失败，返回的offset可以用于续传
+        :return:
+            (ok, offset, msg)
+        '''
+        deadline = Deadline.make(deadline)
+        if not data:    # 空对象
+            ok, code, msg = await self.upload_one_chunk(obj_url=obj_url, offset=start, chunk=b'', deadline=deadline)
+            return (True, start, 'upload successfull') if ok else (False, start, 'upload failed:' + msg)
+
+        items = bytes_offset_chunks(data, offset=start, chunk_size=chunk_size)
+        return await self._upload_chunks(obj_url=obj_url, items=items, start=start, workers=workers,
+                                         deadline=deadline)
+
+    async def upload_bytes(self, bucket_name, path, obj_name, data, start=0, workers=1, chunk_size=5*1024**2,
+                           deadline=None):
+        '''
+        上传内存中的数据
+
+        :param bucket_name: 存储桶名称
+        :param path: 目录路径
+        :param obj_name: 对象名称
+        :param data: bytes、bytearray或memoryview
+        :param start: 数据写入对象的起始偏移量
+        :param workers: 同时上传的分片数
+        :param chunk_size: 分片大小
+        :param deadline: 整个上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时上传失败，返回的offset可以用于续传
+        :return:
+            (ok, offset, msg)
+        '''
+        obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
+        result = await self.upload_bytes_by_url(obj_url=obj_url, data=data, start=start, workers=workers,
+                                                chunk_size=chunk_size, deadline=deadline)
+        if not result[0]:
+            self._invalidate_dir(bucket_name, path)
+        return result
+
+    async def download_one_chunk(self, obj_url, offset, size, deadline=None):
+        '''
+        下载一个分片
+
+        :param obj_url: 对象url
+        :param offset: 分片偏移量
+        :param size: 要下载的分片大小
+        :param deadline: 截止时间，Deadline()或者秒数
+        :return:
+            success: (True, {'chunk': chunk, 'obj_size': xx})
+            failure: (False, msg)
+            404: (None, msg)
+        '''
+        try:
+            r = await self.request('get', obj_url, params={'offset': offset, 'size': size}, deadline=deadline)
+        except self._errors + (DeadlineExceeded,) as e:
+            return (False, str(e))
+
+        if r.status_code == 200:
+            chunk = r.content
+            chunk_size = r.headers.get('evob_chunk_size', None)
+            obj_size = int(r.headers.get('evob_obj_size', 0))
+
+            if chunk_size is not None and int(chunk_size) != len(chunk):
+                return (False, '读取的数据和服务器返回的数据大小不一致')
+
+            return (True, {'chunk': chunk, 'obj_size': obj_size})
+
+        msg = get_response_msg(r)
+        if r.status_code in [400, 404]:
+            return (None, msg)
+
+        return (False, msg)
+
+    async def read_one_chunk(self, bucket_name, path, obj_name, offset, size, deadline=None):
+        '''
+        下载一个分片
+
+        :param bucket_name: 桶
+        :param path:  对象所在目录路径
+        :param obj_name: 对象名称
+        :param offset: 分片偏移量
+        :param size: 要下载的分片大小
+        :param deadline: 截止时间，Deadline()或者秒数
+        :return:
+            同download_one_chunk()
+        '''
+        obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
+        return await self.download_one_chunk(obj_url=obj_url, offset=offset, size=size, deadline=deadline)
+
+    async def _download_chunks(self, obj_url, start, workers, chunk_size, write, deadline=None):
+        '''
+        并发下载对象的分片，先下载第一个分片获取对象大小
+
+        :param write: 分片写入函数write(offset, chunk, obj_size)，协程函数
+        :param deadline: 截止时间Deadline()
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示下载是否成功
+            offset: 从start开始连续下载成功的偏移量
+            msg: 操作结果描述字符串
+        '''
+        ok, result = await self.download_one_chunk(obj_url=obj_url, offset=start, size=chunk_size, deadline=deadline)
+        if ok is None:  # 文件不存在
+            return (False, 0, result)
+        elif not ok:
+            return (False, start, 'downloading interrupt')
+
+        obj_size = result.get('obj_size', 0)
+        chunk = result.get('chunk')
+        await write(start, chunk, obj_size)
+        committed = start + len(chunk)  # 从start开始连续下载成功的偏移量
+        acked = {}                      # 已下载但与committed不连续的分片, {offset: end}
+
+        async def ranges():
+            for offset in range(committed, obj_size, chunk_size):
+                yield offset, min(chunk_size, obj_size - offset)
+
+        async def download(item):
+            offset, size = item
+            ok, result = await self.download_one_chunk(obj_url=obj_url, offset=offset, size=size, deadline=deadline)
+            if ok:
+                await write(offset, result.get('chunk'), obj_size)
+            return ok, result
+
+        results = aiter_completed(download, ranges(), max_in_flight=max(workers, 1))
+        try:
+            async for (offset, size), (ok, result) in results:
+                if not ok:
+                    break
+
+                acked[offset] = offset + len(result.get('chunk'))
+                while committed in acked:
+                    committed = acked.pop(committed)
+        finally:
+            await results.aclose()
+
+        if committed < obj_size:
+            return (False, committed, 'downloading interrupt')
+
+        return (True, committed, 'download ok')
+
+    async def download_obj_by_url(self, obj_url, filename, start=0, workers=1, chunk_size=5*1024**2, deadline=None):
+        '''
+        下载一个对象到文件，文件在线程池中写入，不阻塞事件循环
+
+        :param obj_url: 对象url
+        :param filename: 对象保存的绝对路径文件名
+        :param start: 开始下载的偏移量，start大于0时保留文件中已下载的部分
+        :param workers: 同时下载的分片数
+        :param chunk_size: 分片大小
+        :param deadline: 整个下载的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时下载失败，返回的offset可以用于续传
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示下载是否成功
+            offset: 从start开始连续下载成功的偏移量
+            msg: 操作结果描述字符串
+        '''
+        dir_path = os.path.dirname(filename)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+
+        local_size = os.path.getsize(filename) if os.path.isfile(filename) else 0
+        start = min(start, local_size)
+
+        loop = asyncio.get_running_loop()
+        fd = os.open(filename, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o666)
+        try:
+            async def write(offset, chunk, obj_size):
+                await loop.run_in_executor(None, write_at, fd, chunk, offset)
+
+            ok, offset, msg = await self._download_chunks(obj_url=obj_url, start=start, workers=workers,
+                                                          chunk_size=chunk_size, write=write,
+                                                          deadline=Deadline.make(deadline))
+            # 文件截断到连续下载成功的偏移量处，不保留原有文件中更长的旧数据，以便按文件长度续传
+            os.ftruncate(fd, offset)
+        finally:
+            os.close(fd)
+
+        return ok, offset, msg
+
+    async def download_obj(self, bucket_name, path, obj_name, filename, start=0, workers=1, chunk_size=5*1024**2,
+                           deadline=None):
+        '''
+        下载一个对象到文件
+
+        :param bucket_name: 存储桶名称
+        :param path: 目录路径
+        :param obj_name: 对象名称
+        :param filename: 对象保存的绝对路径文件名
+        :param start: 开始下载的偏移量
+        :param workers: 同时下载的分片数
+        :param chunk_size: 分片大小
+        :param deadline: 整个下载的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时下载失败，返回的offset可以用于续传
+        :return:
+            (ok, offset, msg)
+        '''
+        obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
+        return await self.download_obj_by_url(obj_url=obj_url, filename=filename, start=start, workers=workers,
+                                              chunk_size=chunk_size, deadline=deadline)
+
+    async def read_obj_by_url(self, obj_url, workers=1, chunk_size=5*1024**2, deadline=None):
+        '''
+        下载整个对象到内存中
+
+        :param obj_url: 对象url
+        :param workers: 同时下载的分片数
+        :param chunk_size: 分片大小
+        :param deadline: 整个下载的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间
+        :return:
+            (data, msg)
+            data: 对象数据bytes，下载失败时为None
+            msg: 操作结果描述字符串
+        '''
+        buf = bytearray()
+
+        async def write(offset, chunk, obj_size):
+            if len(buf) < obj_size:
+                buf.extend(bytes(obj_size - len(buf)))
+            buf[offset:offset + len(chunk)] = chunk
+
+        ok, offset, msg = await self._download_chunks(obj_url=obj_url, start=0, workers=workers,
+                                                      chunk_size=chunk_size, write=write,
+                                                      deadline=Deadline.make(deadline))
+        if not ok:
+            return None, msg
+
+        return bytes(buf), msg
+
+    async def read_obj(self, bucket_name, path, obj_name, workers=1, chunk_size=5*1024**2, deadline=None):
+        '''
+        下载整个对象到内存中
+
+        :param bucket_name: 存储桶名称
+        :param path: 目录路径
+        :param obj_name: 对象名称
+        :param workers: 同时下载的分片数
+        :param chunk_size: 分片大小
+        :param deadline: 整个下载的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间
+        :return:
+            (data, msg)
+        '''
+        obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
+        return await self.read_obj_by_url(obj_url=obj_url, workers=workers, chunk_size=chunk_size, deadline=deadline)
+
+    async def delete_obj_by_url(self, obj_url):
+        '''
+        删除一个对象
+
+        :param obj_url: 对象url
+        :return:
+            (ok, code, msg)
+            ok: True or False, 指示请求是否成功
+            code: 请求返回的状态码
+            msg: 请求结果描述字符串
+        '''
+        try:
+            r = await self.request('delete', obj_url)
+        except self._errors as e:
+            return (False, None, str(e))
+
+        if r.status_code == 204:
+            return (True, 204, 'delete successful')
+
+        msg = get_response_msg(r)
+        return (False, r.status_code, msg)
+
+    async def delete_obj(self, bucket_name, dir_path, obj_name):
+        '''
+        删除一个对象
+
+        :param bucket_name: 存储桶名称
+        :param dir_path: 目录路径
+        :param obj_name: 对象名称
+        :return:
+            (ok, code, msg)
+        '''
+        obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=dir_path, obj_name=obj_name)
+        return await self.delete_obj_by_url(obj_url=obj_url)
+
+    async def delete_objs(self, bucket_name, obj_paths, max_in_flight=None):
+        '''
+        并发删除多个对象，按删除完成的顺序返回每个对象的结果
+
+        :param bucket_name: 存储桶名称
+        :param obj_paths: 对象全路径名称的可迭代对象或者异步可迭代对象，按需读取
+        :param max_in_flight: 同时进行的删除请求数上限，默认连接池大小limit
+        :return:
+            异步生成器，(obj_path, ok, code, msg)
+        '''
+        async def delete(obj_path):
+            obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path='', obj_name=obj_path)
+            return await self.delete_obj_by_url(obj_url=obj_url)
+
+        results = aiter_completed(delete, _aiter(obj_paths), max_in_flight=max_in_flight or self.limit)
+        try:
+            async for obj_path, (ok, code, msg) in results:
+                yield obj_path, ok, code, msg
+        finally:
+            await results.aclose()
+
+    async def _get_json(self, url, params=None, ok_msg='Get data successful.'):
+        '''
+        GET请求json数据
+
+        :return:
+            (data, code, msg)
+            data: 请求成功时字典类型的数据，失败时为None
+            code: 请求返回的状态码或None
+            msg: 结果描述字符串
+        '''
+        try:
+            r = await self.request('get', url, params=params)
+        except self._errors as e:
+            return (None, None, str(e))
+
+        if r.status_code == 200:
+            try:
+                data = r.json()
+            except ValueError as e:
+                return (None, None, '获取无效的json数据：' + str(e))
+
+            return (data, 200, ok_msg)
+
+        msg = get_response_msg(r)
+        return (None, r.status_code, msg)
+
+    async def get_metadata(self, bucket_name, path):
+        '''
+        获取元数据
+
+        :param bucket_name: 桶名
+        :param path: 对象或目录路径
+        :return:  (data, code, msg)
+            data: 指示请求成功时字典类型的数据，失败时为None
+            code: 请求返回的状态码或None
+            msg: 结果描述字符串
+        '''
+        url = self._url_builder.build_metadata_url(bucket_name=bucket_name, path=path)
+        return await self._get_json(url, ok_msg='Get metedata successful.')
+
+    async def share_obj_by_url(self, obj_url, share=True, days=0):
+        '''
+        设置对象私有或公有访问权限
+
+        :param obj_url: 对象url
+        :param share: 是否分享，用于设置对象公有或私有, true(公有)，false(私有)
+        :param days: 对象公开分享天数(share=true时有效)，0表示永久公开，负数表示不公开，默认为0
+        :return:
+            (ok, code, msg)
+        '''
+        try:
+            r = await self.request('patch', obj_url, params={'share': share, 'days': days})
+        except self._errors as e:
+            return (False, None, str(e))
+
+        if r.status_code == 200:
+            return (True, 200, 'Set object permission successful.')
+
+        msg = get_response_msg(r)
+        return (False, r.status_code, msg)
+
+    async def share_obj(self, bucket_name, dir_path, obj_name, share=True, days=0):
+        '''
+        设置对象私有或公有访问权限
+
+        :param bucket_name: 存储桶名称
+        :param dir_path: 目录路径
+        :param obj_name: 对象名称
+        :param share: 是否分享，用于设置对象公有或私有, true(公有)，false(私有)
+        :param days: 对象公开分享天数(share=true时有效)，0表示永久公开，负数表示不公开，默认为0
+        :return:
+            (ok, code, msg)
+        '''
+        obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=dir_path, obj_name=obj_name)
+        return await self.share_obj_by_url(obj_url=obj_url, share=share, days=days)
+
+    async def create_dir_by_url(self, dir_url):
+        '''
+        创建一个目录
+
+        :param dir_url: 目录url
+        :return: (ok, code, msg)
+            ok: True or False, 指示请求是否成功，目录已存在时也为True
+            code: 请求返回的状态码
+            msg: 请求结果描述字符串
+        '''
+        try:
+            # 目录已存在时返回400和existing，按成功处理，重复发送的结果相同，可以重试
+            r = await self.request('post', dir_url, idempotent=True)
+        except self._errors as e:
+            return (False, 0, str(e))
+
+        msg = get_response_msg(r)
+        if r.status_code == 201:
+            return (True, 201, msg)
+        elif r.status_code == 400:
+            try:
+                data = r.json()
+            except ValueError:
+                data = {}
+            if data.get('existing', '') is True:
+                return (True, 400, msg)
+
+        return (False, r.status_code, msg)
+
+    async def create_dir(self, bucket_name, base_dir='', dir_name=''):
+        '''
+        创建一个目录
+
+        :param bucket_name: 桶名
+        :param base_dir: 父目录路径
+        :param dir_name:  目录名
+        :return: (ok, code, msg)
+        '''
+        if '/' in dir_name:
+            return (False, None, '目录名不能包含“/”')
+
+        dir_url = self._url_builder.build_dir_url(bucket_name=bucket_name, path=base_dir, dir_name=dir_name)
+        result = await self.create_dir_by_url(dir_url)
+        if result[0]:
+            self.dir_cache.add(bucket_name, join_url_with_slash(base_dir, dir_name))
+        return result
+
+    async def create_path(self, bucket_name=None, base_dir='', dir_path=''):
+        '''
+        创建目录路径
+
+        :param bucket_name: 目录所在的存储桶名称
+        :param base_dir: 要创建的路径dir_path的基路经
+        :param dir_path: 目录路径
+        :return:
+            success: True
+            failure: False
+        '''
+        dirs = get_path_breadcrumb(dir_path, base_dir=base_dir)
+        todo = self.dir_cache.missing(bucket_name, dirs)
+        while todo is not None:
+            for dir_name, p_dir_path in todo:
+                ok, code, _ = await self.create_dir(bucket_name=bucket_name, base_dir=p_dir_path, dir_name=dir_name)
+                if not ok:
+                    break
+            else:
+                return True
+
+            todo = self.dir_cache.replan(bucket_name, dirs, todo, failed=(dir_name, p_dir_path), code=code)
+
+        return False
+
+    async def get_objs_and_subdirs_by_url(self, dir_url, limit=None, offset=None):
+        '''
+        获取目录下的对象和子目录
+
+        :param dir_url: 目录url
+        :param limit: 获取目标 数量限制
+        :param offset: 获取目标 起始偏移量
+        :return:
+            (data, code, msg)
+            data: 指示请求成功时字典类型的数据，失败时为None
+            code: 请求返回的状态码或None
+            msg: 结果描述字符串
+        '''
+        params = {}
+        if limit:
+            params['limit'] = limit
+
+        if offset:
+            params['offset'] = offset
+
+        data, code, msg = await self._get_json(dir_url, params=params)
+        if data and data.get('bucket_name') is not None:
+            self.dir_cache.fill_from_listing(bucket_name=data.get('bucket_name'), dir_path=data.get('dir_path'),
+                                             files=data.get('files', []))
+        return (data, code, msg)
+
+    async def get_objs_and_subdirs(self, bucket_name, dir_name, limit=None, offset=None):
+        '''
+        获取目录下的对象和子目录
+
+        :param bucket_name: 存储桶名称
+        :param dir_name: 目录绝对路径
+        :param limit: 获取目标 数量限制
+        :param offset: 获取目标 起始偏移量
+        :return:
+            (data, code, msg)
+        '''
+        dir_url = self._url_builder.build_dir_url(bucket_name=bucket_name, path=dir_name)
+        data, code, msg = await self.get_objs_and_subdirs_by_url(dir_url=dir_url, limit=limit, offset=offset)
+        if code == 404:
+            self._invalidate_dir(bucket_name, dir_name)
+        return data, code, msg
+
+    async def delete_dir_by_url(self, dir_url):
+        '''
+        删除一个目录
+
+        :param dir_url: 目录url
+        :return: (ok, code, msg)
+        '''
+        try:
+            r = await self.request('delete', dir_url)
+        except self._errors as e:
+            return (False, 0, str(e))
+
+        msg = get_response_msg(r)
+        if r.status_code == 204:
+            return (True, 204, msg)
+
+        return (False, r.status_code, msg)
+
+    async def delete_dir(self, bucket_name, base_dir='', dir_name=''):
+        '''
+        删除一个目录
+
+        :param bucket_name: 桶名
+        :param base_dir: 父目录路径
+        :param dir_name:  目录名
+        :return: (ok, code, msg)
+        '''
+        if '/' in dir_name:
+            return (False, None, '目录名不能包含“/”')
+
+        dir_url = self._url_builder.build_dir_url(bucket_name=bucket_name, path=base_dir, dir_name=dir_name)
+        result = await self.delete_dir_by_url(dir_url)
+        self.dir_cache.invalidate(bucket_name, join_url_with_slash(base_dir, dir_name), recursive=True)
+        return result
+
+    async def create_bucket(self, bucket_name):
+        '''
+        创建一个存储桶
+
+        :param bucket_name: 存储桶名称
+        :return: (ok, code, msg)
+        '''
+        url = self._url_builder.build_bucket_url()
+        try:
+            r = await self.request('post', url, data={'name': bucket_name})
+        except self._errors as e:
+            return (False, None, str(e))
+
+        msg = get_response_msg(r)
+        if r.status_code == 201:
+            return (True, 201, msg)
+
+        return (False, r.status_code, msg)
+
+    async def get_buckets(self):
+        '''
+        获取存储桶列表
+
+        :return: (data, code, msg)
+            data: 请求成功时字典类型的数据，失败时为None
+            code: 请求返回的状态码
+            msg: 请求结果描述字符串
+        '''
+        url = self._url_builder.build_bucket_url()
+        data, code, msg = await self._get_json(url)
+        self.bucket_ids.fill(data)
+        return (data, code, msg)
+
+    async def get_bucket_id(self, bucket_name, refresh=False):
+        '''
+        通过名称获取存储桶id，与ApiCore.get_bucket_id()一致
+
+        :param bucket_name: 存储桶名称
+        :param refresh: True时忽略缓存，重新获取存储桶列表
+        :return: (id, code, msg)
+        '''
+        if not refresh:
+            bid = self.bucket_ids.get(bucket_name)
+            if bid is not None:
+                return (bid, 200, 'ok')
+
+        if self._bucket_ids_lock is None:
+            self._bucket_ids_lock = asyncio.Lock()
+
+        async with self._bucket_ids_lock:
+            bid = None if refresh else self.bucket_ids.get(bucket_name)
+            if bid is None:
+                data, code, msg = await self.get_buckets()
+                if not data:
+                    return (None, code, msg)
+
+                bid = self.bucket_ids.get(bucket_name)
+
+        if bid is None:
+            return (False, 404, 'bucket not found')
+
+        return (bid, 200, 'ok')
+
+    async def bucket_permission(self, bucket_id, public=False):
+        '''
+        设置存储桶公有私有权限
+
+        :param bucket_id: 存储桶id
+        :param public: True(公有)，False(私有)
+        :return: (ok, code, msg)
+        '''
+        url = self._url_builder.build_bucket_url(bucket_id=bucket_id)
+        try:
+            r = await self.request('patch', url, params={'public': public})
+        except self._errors as e:
+            return (False, None, str(e))
+
+        msg = get_response_msg(r)
+        if r.status_code == 200:
+            return (True, 200, msg)
+
+        return (False, r.status_code, msg)
+
+    async def move_obj(self, bucket_name, path, obj_name, move_to=None, rename=None):
+        '''
+        移动或重命名一个对象
+
+        :param bucket_name: 桶名称
+        :param path:  对象所在父目录路径
+        :param obj_name: 对象名称
+        :param move_to: 移动对象到此目录路径，None为不移动
+        :param rename: 重命名对象
+        :return: (ok, data)
+            ok: True or False, 指示请求是否成功
+            data: dict{
+                    code: xx,   # 请求返回的状态码
+                    msg: xx,    # 请求结果描述字符串
+                    obj: { ]    # 移动后的对象信息，此数据仅移动成功时存在
+                }
+        '''
+        params = {}
+        if move_to:
+            params['move_to'] = move_to
+
+        if rename:
+            params['rename'] = rename
+
+        url = self._url_builder.build_move_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
+        try:
+            r = await self.request('post', url, params=params)
+        except self._errors as e:
+            return False, {'code': None, 'msg': str(e)}
+
+        msg = get_response_msg(r)
+        if r.status_code == 201:
+            try:
+                data = r.json()
+            except ValueError as e:
+                return True, {'code': None, 'msg': '获取无效的json数据：' + str(e)}
+
+            return True, {'code': 201, 'msg': msg, 'obj': data.get('obj')}
+
+        return False, {'code': r.status_code, 'msg': msg}
+
+
+class AsyncClient():
+    '''
+    asyncio异步客户端，接口与Client一致，方法为协程
+
+    Usage::
+      >>> async with AsyncClient() as client:
+      ...     ok, offset, msg = await client.put_bytes('bucket', 'a/b.txt', b'hello')
+    '''
+    def __init__(self, session=None, limit=None, retry=None):
+        '''
+        :param session: aiohttp.ClientSession，默认新建一个此客户端独占的会话
+        :param limit: 新建会话时连接池的最大连接数，即同时进行的请求数上限，默认configs.AIO_LIMIT
+        :param retry: 请求重试策略RetryPolicy，默认RetryPolicy()
+        '''
+        self.apicore = AsyncApiCore(session=session, limit=limit, retry=retry)
+
+    async def close(self):
+        '''
+        关闭客户端独占的连接池
+        '''
+        await self.apicore.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def put_object(self, bucket_name, obj_name, filename, workers=1, chunk_size=5*1024**2, deadline=None):
+        '''
+        上传一个对象
+
+        :param bucket_name:  存储桶名称
+        :param obj_name:  对象全路径名称
+        :param filename:  上传文件绝对路径
+        :param workers: 同时上传的分片数
+        :param chunk_size: 分片大小
+        :param deadline: 整个上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时上传失败，返回的offset可以用于续传
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示上传是否成功
+            offset: 已上传文件的偏移量
+            msg: 上传结果描述字符串
+        '''
+        path, name = get_path_and_name(obj_name)
+        return await self.apicore.upload_obj(bucket_name=bucket_name, path=path, obj_name=name, filename=filename,
+                                             workers=workers, chunk_size=chunk_size, deadline=deadline)
+
+    async def put_bytes(self, bucket_name, obj_name, data, workers=1, chunk_size=5*1024**2, deadline=None):
+        '''
+        上传内存中的数据
+
+        :param bucket_name:  存储桶名称
+        :param obj_name:  对象全路径名称
+        :param data: bytes、bytearray或memoryview
+        :param workers: 同时上传的分片数
+        :param chunk_size: 分片大小
+        :param deadline: 整个上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时上传失败，返回的offset可以用于续传
+        :return:
+            (ok, offset, msg)
+        '''
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            return (False, 0, 'data must be bytes, bytearray or memoryview.')
+
+        path, name = get_path_and_name(obj_name)
+        return await self.apicore.upload_bytes(bucket_name=bucket_name, path=path, obj_name=name, data=data,
+                                               workers=workers, chunk_size=chunk_size, deadline=deadline)
+
+    async def download_object(self, bucket_name, obj_name, filename, workers=1, chunk_size=5*1024**2, deadline=None):
+        '''
+        下载一个对象
+
+        :param bucket_name:  存储桶名称
+        :param obj_name:  对象全路径名称
+        :param filename:  对象保存文件名绝对路径
+        :param workers: 同时下载的分片数
+        :param chunk_size: 分片大小
+        :param deadline: 整个下载的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时下载失败，返回的offset可以用于续传
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示下载是否成功
+            offset: 已下载对象的偏移量
+            msg: 下载结果描述字符串
+        '''
+        path, name = get_path_and_name(obj_name)
+        return await self.apicore.download_obj(bucket_name=bucket_name, path=path, obj_name=name,
+                                               filename=filename, workers=workers, chunk_size=chunk_size,
+                                               deadline=deadline)
+
+    async def get_bytes(self, bucket_name, obj_name, workers=1, chunk_size=5*1024**2, deadline=None):
+        '''
+        下载整个对象到内存中
+
+        :param bucket_name:  存储桶名称
+        :param obj_name:  对象全路径名称
+        :param workers: 同时下载的分片数
+        :param chunk_size: 分片大小
+        :param deadline: 整个下载的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间
+        :return:
+            (data, msg)
+            data: 对象数据bytes，下载失败时为None
+            msg: 操作结果描述字符串
+        '''
+        path, name = get_path_and_name(obj_name)
+        return await self.apicore.read_obj(bucket_name=bucket_name, path=path, obj_name=name, workers=workers,
+                                           chunk_size=chunk_size, deadline=deadline)
+
+    async def write_one_chunk(self, bucket_name, obj_name, offset, chunk):
+        '''
+        上传一个分片
+
+        :param bucket_name: 桶
+        :param obj_name: 对象绝对路径
+        :param offset: 分片偏移量
+        :param chunk: 分片数据 bytes或者二进制方式打开的文件描述符, 数据不等大于20MB
+        :return:
+            success: (True,  msg)
+            failure: (False, msg)
+            可能参数有误，目录路径不存在等各种原因不具备上传条件: (None, msg)
+        '''
+        ok, code, msg = await self.apicore.write_one_chunk(bucket_name=bucket_name, path=obj_name, obj_name='',
+                                                           offset=offset, chunk=chunk)
+        return ok, msg
+
+    async def read_one_chunk(self, bucket_name, obj_name, offset, size):
+        '''
+        下载一个分片
+
+        :param bucket_name: 桶
+        :param obj_name: 对象绝对路径
+        :param offset: 分片偏移量
+        :param size: 要下载的分片大小
+        :return:
+            success: (True, {'chunk': chunk, 'obj_size': xx})
+            failure: (False, msg)
+            404: (None, msg) 资源不存在
+        '''
+        return await self.apicore.read_one_chunk(bucket_name=bucket_name, path=obj_name, obj_name='',
+                                                 offset=offset, size=size)
+
+    async def delete_object(self, bucket_name, obj_name):
+        '''
+        删除一个对象
+
+        :param bucket_name:  存储桶名称
+        :param obj_name:  对象全路径名称
+        :return:
+            success: (True,  msg)
+            failure: (False, msg)
+        '''
+        path, name = get_path_and_name(obj_name)
+        ok, code, msg = await self.apicore.delete_obj(bucket_name=bucket_name, dir_path=path, obj_name=name)
+        return ok, msg
+
+    async def delete_objects(self, bucket_name, obj_names, concurrency=None):
+        '''
+        并发删除多个对象，按删除完成的顺序返回每个对象的结果
+
+        :param bucket_name:  存储桶名称
+        :param obj_names:  对象全路径名称的可迭代对象或者异步可迭代对象，按需读取
+        :param concurrency: 同时进行的删除请求数，默认连接池大小limit
+        :return:
+            异步生成器，(obj_name, ok, msg)
+        '''
+        async for obj_name, ok, code, msg in self.apicore.delete_objs(bucket_name=bucket_name, obj_paths=obj_names,
+                                                                      max_in_flight=concurrency):
+            yield obj_name, ok, msg
+
+    async def share_object(self, bucket_name, obj_name, share=True, days=0):
+        '''
+        分享公开一个对象访问权限
+
+        :param bucket_name: 存储桶名称
+        :param obj_name:  对象全路径名称
+        :param share: 是否分享，用于设置对象公有或私有, true(公有)，false(私有)
+        :param days: 对象公开分享天数(share=true时有效)，0表示永久公开，负数表示不公开，默认为0
+        :return:
+            (ok, msg)
+        '''
+        path, name = get_path_and_name(obj_name)
+        ok, code, msg = await self.apicore.share_obj(bucket_name=bucket_name, dir_path=path, obj_name=name,
+                                                     share=share, days=days)
+        return ok, msg
+
+    async def create_dir(self, bucket_name, dir_name):
+        '''
+        创建一个文件夹
+
+        :param bucket_name:  存储桶名称
+        :param dir_name:  目录名全路径
+        :return:
+            success: (True,  msg)
+            failure: (False, msg)
+        '''
+        path, name = get_path_and_name(dir_name)
+        ok, code, msg = await self.apicore.create_dir(bucket_name=bucket_name, base_dir=path, dir_name=name)
+        return ok, msg
+
+    async def delete_dir(self, bucket_name, dir_name):
+        '''
+        删除一个文件夹
+
+        :param bucket_name:  存储桶名称
+        :param dir_name:  目录名全路径
+        :return:
+            success: (True,  msg)
+            failure: (False, msg)
+        '''
+        if dir_name.strip('/') == '':
+            return False, '无法删除，当前为存储桶下根目录.'
+
+        ok, code, msg = await self.apicore.delete_dir(bucket_name=bucket_name, base_dir=dir_name)
+        return ok, msg
+
+    async def list_dir(self, bucket_name, dir_name='', offset=None, limit=None):
+        '''
+        获取目录下的子目录和对象列表的一页
+
+        :param bucket_name:  存储桶名称
+        :param dir_name:  目录名全路径
+        :param offset: 起始偏移量
+        :param limit: 每页数据项数
+        :return:
+            (data, code, msg)
+            data: 请求成功时字典类型的数据，失败时为None
+            code: 请求返回的状态码或None
+            msg: 结果描述字符串
+        '''
+        return await self.apicore.get_objs_and_subdirs(bucket_name=bucket_name, dir_name=dir_name, limit=limit,
+                                                       offset=offset)
+
+    async def get_metadata(self, bucket_name, filename):
+        '''
+        获取一个对象或目录的元数据
+
+        :param bucket_name: 桶名
+        :param filename: 全路径文件名
+        :return:
+            (data, code, msg)
+        '''
+        return await self.apicore.get_metadata(bucket_name=bucket_name, path=filename)
+
+    async def isdir(self, bucket_name, dir_name):
+        '''
+        是否是目录
+
+        :return:
+            True: 是目录
+            False: 对象或不存在此路径
+        '''
+        data, code, msg = await self.get_metadata(bucket_name=bucket_name, filename=dir_name)
+        return bool(data) and (data.get('data') or {}).get('fod') is False
+
+    async def isfile(self, bucket_name, filename):
+        '''
+        是否是对象
+
+        :return:
+            True: 是文件
+            False: 目录或不存在此路径
+        '''
+        data, code, msg = await self.get_metadata(bucket_name=bucket_name, filename=filename)
+        return bool(data) and bool((data.get('data') or {}).get('fod'))
+
+    async def move_object(self, bucket_name, obj_name, to, rename=None):
+        '''
+        移动重命名对象
+
+        :param bucket_name: 对象所在bucket桶名
+        :param obj_name: 要移动的对象名全路径
+        :param to:  对象移动目标目录路径， '/'和空字符串表示bucket桶下根目录
+        :param rename:  重命名对象新名称， 默认不重命名
+        :return:  (ok, data)
+        '''
+        if rename and ('/' in rename or len(rename) > 255):
+            return False, '对象名称不能包含“/”字符，长度不能大于255个字符'
+
+        path, name = get_path_and_name(obj_name)
+        return await self.apicore.move_obj(bucket_name=bucket_name, path=path, obj_name=name, move_to=to,
+                                           rename=rename)
+
+    async def rename_object(self, bucket_name, obj_name, rename):
+        '''
+        重命名对象
+
+        :param bucket_name: 对象所在bucket桶名
+        :param obj_name: 要重命名的对象名全路径
+        :param rename: 新对象名称
+        :return: (ok, data)
+        '''
+        if '/' in rename or len(rename) > 255:
+            return False, '对象名称不能包含“/”字符，长度不能大于255个字符'
+
+        path, name = get_path_and_name(obj_name)
+        return await self.apicore.move_obj(bucket_name=bucket_name, path=path, obj_name=name, rename=rename)
+
+    async def get_buckets(self):
+        '''
+        获取存储桶列表
+
+        :return: (data, msg)
+            data: 请求成功时字典类型的数据，失败时为None
+            msg: 请求结果描述字符串
+        '''
+        data, _, msg = await self.apicore.get_buckets()
+        if not data:
+            return None, msg
+
+        return data, msg
+
+    async def bucket_permission(self, bucket_name, public=False):
+        '''
+        设置存储桶公有私有权限
+
+        :param bucket_name: 存储桶名称
+        :param public: True(公有)，False(私有)
+        :return: (ok, msg)
+        '''
+        bucket_id, _, msg = await self.apicore.get_bucket_id(bucket_name=bucket_name)
+        if not bucket_id:
+            return False, msg
+
+        ok, code, msg = await self.apicore.bucket_permission(bucket_id=bucket_id, public=public)
+        if not ok and code == 404:
+            self.apicore.bucket_ids.pop(bucket_name)
+        return bool(ok), msg
@@ -1,17 +1,22 @@
+from . import request
 from .core import ApiCore
+from .journal import UploadJournal
+from .cache import MetadataCache
+from .reader import HarborObjectReader
 from .config import join_url_with_slash
 
 
 class Directory():
-    def __init__(self, bucket_name, cur_dir_path):
+    def __init__(self, bucket_name, cur_dir_path, apicore=None):
         '''
         :param bucket_name: 目录操作对应的存储桶名称
         :param cur_dir_path: 当前目录绝对路径
+        :param apicore: ApiCore对象，用于共享连接池，默认新建
         '''
         self._bucket_name = bucket_name
         self._cur_dir_path = cur_dir_path.rstrip('/')
         self._paginater = None
-        self.apicore = ApiCore()
+        self.apicore = apicore or ApiCore()
 
     @property
     def bucket_name(self):
@@ -73,6 +78,24 @@ class Directory():
         ok, code, msg = self.apicore.delete_dir(bucket_name=bucket_name, base_dir=cur_dir_path)
         return ok, msg
 
+    def rmtree(self, workers=8, dry_run=False, callback=None):
+        '''
+        递归删除当前目录及其下所有的子目录和对象
+
+        :param workers: 并发列举和删除的线程数
+        :param dry_run: True时只遍历目录树，不删除，返回将要删除的对象和目录的统计
+        :param callback: 每个对象或目录删除后的回调函数callback(kind, path, ok, msg)，kind为'obj'或'dir'
+        :return:
+            (ok, stats)
+            ok: True or False, 指示是否全部删除成功
+            stats: {'objs': 删除的对象数, 'dirs': 删除的目录数, 'errors': [(path, msg), ...]}
+        '''
+        if self.cur_dir_path == '':
+            return False, {'objs': 0, 'dirs': 0, 'errors': [('', '无法删除，当前为存储桶下根目录.')]}
+
+        return self.apicore.rmtree(bucket_name=self.bucket_name, dir_path=self.cur_dir_path, workers=workers,
+                                   dry_run=dry_run, callback=callback)
+
     def get_objs_and_subdirs(self, offset=None, limit=None):
         '''
         获取目录下的对象和子目录
@@ -119,46 +142,59 @@ class Directory():
 
         return [(o.get('name'), '/'.join([path, o.get('name')]).lstrip('/')) for o in objs_and_subdirs if o.get('fod')]
 
-    def _put_obj(self, bucket_name, path, obj_name, filename, offset=0):
+    def _put_obj(self, bucket_name, path, obj_name, filename, offset=0, workers=1, max_in_flight=None,
+                 journal=None, use_mmap=False, chunk_size=5*1024**2, deadline=None):
         '''
         上传一个对象
 
         :param obj_name: 对象名称
         :param filename: 上传的文件绝对路径
         :param offset: 文件上传的起始偏移量
+        :param workers: 并发上传分片的线程数，大于1时多个分片并发上传
+        :param max_in_flight: 并发上传时已读取未完成上传的分片数上限，默认workers的2倍
+        :param journal: 上传日志UploadJournal，记录已上传的分片，并从日志记录的已上传偏移量处续传
+        :param use_mmap: True时内存映射(mmap)文件，分片数据不经拷贝直接发送；上传过程中文件不能被修改或截断
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(同一客户端的上传、下载分别共享一个AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param deadline: 上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间，超时后可从返回的offset续传
         :return:
             (ok, offset, msg)
             ok: True or False, 指示上传是否成功
             offset: 已上传文件的偏移量
             msg: 上传结果描述字符串
         '''
-        # size = os.path.getsize(filename)
-        mark_offset = offset
-        i = 0
-        while True:
-            ok, offset, msg = self.apicore.upload_obj(bucket_name=bucket_name, path=path,
-                                                      obj_name=obj_name, filename=filename, start=offset)
-            # 上传成功
-            if ok:
-                return True, offset, msg
-            # 上传失败多次，或一点也未上传成功（可能参数有误，或网络问题等不具备上传条件），放弃上传，上传失败
-            elif i > 5 or offset == 0:
-                return False, offset, msg
-            # 上传部分，继续尝试上传
-            else:
-                if mark_offset == offset:  # 同一偏移量处上传失败，次数++
-                    i += 1
-                else:
-                    mark_offset = offset
-                continue
+        callback = None
+        if journal is not None:
+            key = journal.make_key(bucket_name=bucket_name, obj_path=join_url_with_slash(path, obj_name),
+                                   filename=filename)
+            offset = max(offset, journal.get_offset(key))
+
+            def callback(chunk_offset, chunk_size):
+                journal.record(key, chunk_offset, chunk_size)
+
+        # 每个分片请求由apicore的重试策略单独重试，失败时返回的offset可用于续传
+        ok, offset, msg = self.apicore.upload_obj(bucket_name=bucket_name, path=path, obj_name=obj_name,
+                                                  filename=filename, start=offset, workers=workers,
+                                                  max_in_flight=max_in_flight, callback=callback,
+                                                  use_mmap=use_mmap, chunk_size=chunk_size, deadline=deadline)
+        if ok and journal is not None:
+            journal.remove(key)
 
-    def put_object(self, obj_name, filename, offset=0):
+        return ok, offset, msg
+
+    def put_object(self, obj_name, filename, offset=0, workers=1, max_in_flight=None, journal=None, use_mmap=False,
+                   chunk_size=5*1024**2, deadline=None):
         '''
         上传一个对象到当前目录
 
         :param obj_name: 对象的名称
         :param filename: 要上传的文件的绝对路径
         :param offset: 文件上传的起始偏移量
+        :param workers: 并发上传分片的线程数，大于1时多个分片并发上传
+        :param max_in_flight: 并发上传时已读取未完成上传的分片数上限，默认workers的2倍
+        :param journal: 上传日志UploadJournal，进程重启后可从日志记录的已上传偏移量处续传
+        :param use_mmap: True时内存映射(mmap)文件，分片数据不经拷贝直接发送；上传过程中文件不能被修改或截断
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(同一客户端的上传、下载分别共享一个AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param deadline: 上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间，超时后可从返回的offset续传
         :return:
             (ok, offset, msg)
             ok: True or False, 指示上传是否成功
@@ -169,9 +205,58 @@ class Directory():
             return (False, 0, 'Object names cannot contain "/" characters.')
 
         return self._put_obj(bucket_name=self.bucket_name, path=self.cur_dir_path, obj_name=obj_name,
-                             filename=filename, offset=offset)
+                             filename=filename, offset=offset, workers=workers, max_in_flight=max_in_flight,
+                             journal=journal, use_mmap=use_mmap, chunk_size=chunk_size, deadline=deadline)
 
-    def _download_obj(self, bucket_nmae, path, obj_name, filename, offset=0):
+    def put_stream(self, obj_name, stream, offset=0, chunk_size=5*1024**2, workers=1, max_in_flight=None,
+                   deadline=None):
+        '''
+        上传内存中的数据或数据流到当前目录下的一个对象，不需要本地文件，数据总大小可以未知
+
+        :param obj_name: 对象的名称
+        :param stream: bytes、bytearray、memoryview，有read()方法的文件类对象(不需要支持seek)，或者返回bytes的迭代器
+        :param offset: 数据写入对象的起始偏移量
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(同一客户端的上传、下载分别共享一个AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param workers: 并发上传分片的线程数，大于1时多个分片并发上传
+        :param max_in_flight: 并发上传时已读取未完成上传的分片数上限，默认workers的2倍
+        :param deadline: 上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间，超时后可从返回的offset续传
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示上传是否成功
+            offset: 已上传到对象的偏移量
+            msg: 上传结果描述字符串
+        '''
+        if '/' in obj_name:
+            return (False, 0, 'Object names cannot contain "/" characters.')
+
+        return self.apicore.upload_stream(bucket_name=self.bucket_name, path=self.cur_dir_path, obj_name=obj_name,
+                                          stream=stream, start=offset, chunk_size=chunk_size, workers=workers,
+                                          max_in_flight=max_in_flight, deadline=deadline)
+
+    def put_bytes(self, obj_name, data, offset=0, chunk_size=5*1024**2, workers=1, deadline=None):
+        '''
+        上传内存中的数据到当前目录下的一个对象
+
+        :param obj_name: 对象的名称
+        :param data: bytes、bytearray或memoryview
+        :param offset: 数据写入对象的起始偏移量
+        :param chunk_size: 分片大小
+        :param workers: 并发上传分片的线程数，大于1时多个分片并发上传
+        :param deadline: 上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间，超时后可从返回的offset续传
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示上传是否成功
+            offset: 已上传到对象的偏移量
+            msg: 上传结果描述字符串
+        '''
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            return (False, 0, 'data must be bytes, bytearray or memoryview.')
+
+        return self.put_stream(obj_name=obj_name, stream=data, offset=offset, chunk_size=chunk_size, workers=workers,
+                               deadline=deadline)
+
+    def _download_obj(self, bucket_nmae, path, obj_name, filename, offset=0, workers=1, resume=False,
+                      chunk_size=5*1024**2, deadline=None):
         '''
         下载一个对象
 
@@ -180,39 +265,33 @@ class Directory():
         :param obj_name: 对象名称
         :param filename: 下载的文件保存的绝对路径文件名
         :param offset: 对象下载的起始偏移量
+        :param workers: 并发下载分片的线程数，大于1时多个分片并发下载
+        :param resume: True时从文件filename已下载部分的末尾处继续下载，忽略offset
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(同一客户端的上传、下载分别共享一个AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param deadline: 下载的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间，超时后可从返回的offset续传
         :return:
             (ok, offset, msg)
             ok: True or False, 指示下载是否成功
             offset: 已下载对象的偏移量
             msg: 操作结果描述字符串
         '''
-        mark_offset = offset
-        i = 0
-        while True:
-            ok, offset, msg = self.apicore.download_obj(bucket_name=bucket_nmae, path=path, obj_name=obj_name,
-                                                        filename=filename, start=offset)
-            i += 1
-            # 下载成功
-            if ok:
-                return (True, offset, msg)
-            # 下载失败多次，或一点也未上传成功（可能参数有误，或网络问题等不具备下载条件），放弃下载，下载失败
-            elif i > 5 or offset == 0:
-                return (False, offset, msg)
-            # 下载了部分，继续尝试下载
-            else:
-                if mark_offset == offset:  # 同一偏移量处下载失败，次数++
-                    i += 1
-                else:
-                    mark_offset = offset
-                continue
+        # 每个分片请求由apicore的重试策略单独重试，失败时返回的offset可用于续传
+        return self.apicore.download_obj(bucket_name=bucket_nmae, path=path, obj_name=obj_name, filename=filename,
+                                         start=offset, workers=workers, resume=resume, chunk_size=chunk_size,
+                                         deadline=deadline)
 
-    def download_object(self, obj_name, filename, offset=0):
+    def download_object(self, obj_name, filename, offset=0, workers=1, resume=False, chunk_size=5*1024**2,
+                        deadline=None):
         '''
         下载一个对象
 
         :param obj_name:  对象名称
         :param filename:  对象要保存的文件名绝对路径
         :param offset: 对象下载的起始偏移量
+        :param workers: 并发下载分片的线程数，大于1时多个分片并发下载
+        :param resume: True时从文件filename已下载部分的末尾处继续下载，忽略offset
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(同一客户端的上传、下载分别共享一个AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param deadline: 下载的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间，超时后可从返回的offset续传
         :return:
             (ok, offset, msg)
             ok: True or False, 指示下载是否成功
@@ -223,7 +302,27 @@ class Directory():
             return (False, 0, 'Object names cannot contain "/" characters.')
 
         return self._download_obj(bucket_nmae=self.bucket_name, path=self.cur_dir_path, obj_name=obj_name,
-                                  filename=filename, offset=offset)
+                                  filename=filename, offset=offset, workers=workers, resume=resume,
+                                  chunk_size=chunk_size, deadline=deadline)
+
+    def iter_object(self, obj_name, chunk_size=5*1024**2, prefetch=2, offset=0):
+        '''
+        流式读取当前目录下一个对象的数据，后台预先下载之后的分片，不写入本地文件
+
+        :param obj_name: 对象名称
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(同一客户端的上传、下载分别共享一个AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param prefetch: 后台预先下载的分片数，0为不预先下载
+        :param offset: 开始读取的偏移量
+        :return:
+            生成器，依次返回对象的数据分片bytes
+        :raises FileNotFoundError: 对象不存在
+        :raises IOError: 下载分片失败
+        '''
+        if '/' in obj_name:
+            raise ValueError('Object names cannot contain "/" characters.')
+
+        return self.apicore.iter_obj(bucket_name=self.bucket_name, path=self.cur_dir_path, obj_name=obj_name,
+                                     offset=offset, chunk_size=chunk_size, prefetch=prefetch)
 
     def delete_object(self, obj_name, is_sub=False):
         '''
@@ -301,6 +400,50 @@ class Directory():
         '''
         return self.get_paginater(per_page=per_page).first_page()
 
+    def iter_entries(self, per_page=1000, prefetch=2, workers=1):
+        '''
+        依次返回当前目录下所有的子目录和对象信息，自动获取所有分页；
+        调用者处理当前页时，后台线程预先获取之后的分页
+
+        :param per_page: 每页获取的数量
+        :param prefetch: 后台预先获取的页数，0为不预先获取
+        :param workers: 并发获取分页的线程数，大于1时获取第一页后按总数count同时获取其余的分页
+        :return:
+            生成器，依次返回子目录或对象的信息字典，'fod'为True时是对象
+        :raises FileNotFoundError: 目录不存在
+        :raises IOError: 获取分页失败
+        '''
+        return self.apicore.iter_objs_and_subdirs(bucket_name=self.bucket_name, dir_name=self.cur_dir_path,
+                                                  per_page=per_page, prefetch=prefetch, workers=workers)
+
+    def list_all(self, per_page=1000, workers=8):
+        '''
+        当前目录下所有的子目录和对象信息列表，获取第一页后按总数count并发获取其余的分页
+
+        :param per_page: 每页获取的数量
+        :param workers: 并发获取分页的线程数
+        :return:
+            子目录和对象信息字典的列表，按分页顺序
+        :raises FileNotFoundError: 目录不存在
+        :raises IOError: 获取分页失败
+        '''
+        return list(self.iter_entries(per_page=per_page, prefetch=0, workers=workers))
+
+    def list_compact(self, recursive=False, per_page=1000, workers=8):
+        '''
+        当前目录下所有的子目录和对象信息，保存在紧凑的列存储CompactListing中，大目录占用的内存远小于list_all()
+
+        :param recursive: True时包括所有子目录下的子目录和对象
+        :param per_page: 每页获取的数量
+        :param workers: 并发获取分页(recursive时为并发列举目录)的线程数
+        :return:
+            CompactListing()
+        :raises FileNotFoundError: 目录不存在
+        :raises IOError: 获取分页失败
+        '''
+        return self.apicore.list_compact(bucket_name=self.bucket_name, dir_name=self.cur_dir_path,
+                                         recursive=recursive, per_page=per_page, workers=workers)
+
     def move_object(self, obj_name, to, rename=None):
         '''
         移动重命名对象
@@ -348,9 +491,14 @@ class Directory():
 
 
 class Bucket():
-    def __init__(self, bucket_name, *args, **kwargs):
+    def __init__(self, bucket_name, *args, apicore=None, **kwargs):
+        '''
+        :param bucket_name: 存储桶名称
+        :param apicore: ApiCore对象，用于共享连接池和存储桶id缓存，默认新建
+        '''
         self._bucket_name = bucket_name
         self._id = None # bucket id
+        self.apicore = apicore or ApiCore()
 
     @property
     def bucket_name(self):
@@ -372,29 +520,20 @@ class Bucket():
 
         :param dir_path:  当前目录路径
         '''
-        return Directory(bucket_name=self.bucket_name, cur_dir_path=dir_path)
+        return Directory(bucket_name=self.bucket_name, cur_dir_path=dir_path, apicore=self.apicore)
 
     def get_bucket_id(self, bucket_name):
         '''
         通过名称获取bucket的id
 
         :param bucket_name: 桶名称
-        :param buckets: self.get_buckets()获取的data
         :return:
             success: id
             failed: False
             error: None
         '''
-        buckets, _, msg = ApiCore().get_buckets()
-        if not buckets:
-            return None
-
-        bs = buckets.get('buckets')
-        for b in bs:
-            if b.get('name') == bucket_name:
-                return b.get('id')
-
-        return False
+        bid, _, _ = self.apicore.get_bucket_id(bucket_name=bucket_name)
+        return bid
 
     @property
     def id(self):
@@ -419,9 +558,18 @@ class Bucket():
             ok: True or False, 指示请求是否成功
             msg: 请求结果描述字符串
         '''
-        bucket_id = self.id
-        ok, _, msg = ApiCore().bucket_permission(bucket_id=bucket_id, public=public)
+        if not self._id:
+            bid, _, msg = self.apicore.get_bucket_id(bucket_name=self.bucket_name)
+            if not bid:
+                return False, msg
+            self._id = bid
+
+        ok, code, msg = self.apicore.bucket_permission(bucket_id=self._id, public=public)
         if not ok:
+            # 存储桶可能已被删除，缓存的id失效
+            if code == 404:
+                self._id = None
+                self.apicore.bucket_ids.pop(self.bucket_name)
             return False, msg
 
         return True, msg
@@ -431,8 +579,8 @@ class BasePage():
     '''
     分页基类
     '''
-    def __init__(self, data):
-        self.apicore = ApiCore()
+    def __init__(self, data, apicore=None):
+        self.apicore = apicore or ApiCore()
         self.__Initialize(data)
 
     @property
@@ -526,7 +674,7 @@ class ListDirPage(BasePage):
         if not data:
             return None
 
-        return ListDirPage(data)
+        return ListDirPage(data, apicore=self.apicore)
 
     def previous_page(self):
         '''
@@ -543,7 +691,7 @@ class ListDirPage(BasePage):
         if not data:
             return None
 
-        return ListDirPage(data)
+        return ListDirPage(data, apicore=self.apicore)
 
 
 class ListDirPaginater():
@@ -576,11 +724,11 @@ class ListDirPaginater():
             failed: None    网路问题或目录不存在等请求失败
         '''
         if not self._page:
-            data, code, msg = self.dir.get_objs_and_subdirs(self, limit=self._per_page)
+            data, code, msg = self.dir.get_objs_and_subdirs(limit=self._per_page)
             if not data:
                 return None
             else:
-                self._page = ListDirPage(data)
+                self._page = ListDirPage(data, apicore=self.dir.apicore)
 
         return self._page
 
@@ -601,8 +749,41 @@ def get_path_and_name(p):
     return path, name
 
 class Client():
-    def __init__(self):
-        pass
+    def __init__(self, session=None, journal=None, retry=None, metadata_cache=None):
+        '''
+        :param session: 连接池会话request.HarborSession，默认新建一个此客户端独占的会话，
+                        连接池大小由全局配置POOL_CONNECTIONS、POOL_MAXSIZE、POOL_BLOCK指定
+        :param journal: 上传日志UploadJournal或日志数据库文件路径，put_object()从日志记录的已上传偏移量处续传，
+                        默认不记录上传日志
+        :param retry: 请求重试策略RetryPolicy，此客户端的所有请求(包括每个分片)共享其重试预算，默认RetryPolicy()
+        :param metadata_cache: 元数据缓存MetadataCache，或者True使用默认的MetadataCache()；get_metadata()、isdir()、
+                        isfile()优先使用缓存，此客户端的写操作使相关路径的缓存失效，列举目录时填充缓存；默认不缓存
+        '''
+        if metadata_cache is True:
+            metadata_cache = MetadataCache()
+
+        self._own_session = session is None
+        self.apicore = ApiCore(session=session or request.HarborSession(), retry=retry,
+                               metadata_cache=metadata_cache)
+        if isinstance(journal, str):
+            journal = UploadJournal(journal)
+        self.journal = journal
+
+    def close(self):
+        '''
+        关闭客户端独占的连接池
+        '''
+        if self._own_session:
+            self.apicore.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _dir(self, bucket_name, dir_path):
+        return Directory(bucket_name=bucket_name, cur_dir_path=dir_path, apicore=self.apicore)
 
     def bucket(self, bucket_name):
         '''
@@ -610,15 +791,22 @@ class Client():
 
         :param bucket_name:  存储桶名称
         '''
-        return Bucket(bucket_name)
+        return Bucket(bucket_name, apicore=self.apicore)
 
-    def put_object(self, bucket_name, obj_name, filename):
+    def put_object(self, bucket_name, obj_name, filename, workers=1, max_in_flight=None, use_mmap=False,
+                   chunk_size=5*1024**2, deadline=None):
         '''
         上传一个对象
 
         :param bucket_nmae:  存储桶名称
         :param obj_name:  对象全路径名称
         :param filename:  上传文件绝对路径
+        :param workers: 并发上传分片的线程数，大于1时多个分片并发上传
+        :param max_in_flight: 并发上传时已读取未完成上传的分片数上限，默认workers的2倍
+        :param use_mmap: True时内存映射(mmap)文件，分片数据不经拷贝直接发送，减少内存占用和CPU消耗；
+                        上传过程中文件不能被修改或截断
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(同一客户端的上传、下载分别共享一个AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param deadline: 上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间，超时后可从返回的offset续传
         :return:
             (ok, offset, msg)
             ok: True or False, 指示上传是否成功
@@ -626,15 +814,65 @@ class Client():
             msg: 上传结果描述字符串
         '''
         path, name = get_path_and_name(obj_name)
-        return Directory(bucket_name=bucket_name, cur_dir_path=path).put_object(obj_name=name, filename=filename)
+        return self._dir(bucket_name, path).put_object(obj_name=name, filename=filename, workers=workers,
+                                                       max_in_flight=max_in_flight, journal=self.journal,
+                                                       use_mmap=use_mmap, chunk_size=chunk_size, deadline=deadline)
+
+    def put_stream(self, bucket_name, obj_name, stream, chunk_size=5*1024**2, workers=1, max_in_flight=None,
+                   deadline=None):
+        '''
+        上传内存中的数据或数据流，不需要本地文件，数据总大小可以未知
+
+        :param bucket_nmae:  存储桶名称
+        :param obj_name:  对象全路径名称
+        :param stream: bytes、bytearray、memoryview，有read()方法的文件类对象(不需要支持seek)，或者返回bytes的迭代器
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(同一客户端的上传、下载分别共享一个AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param workers: 并发上传分片的线程数，大于1时多个分片并发上传
+        :param max_in_flight: 并发上传时已读取未完成上传的分片数上限，默认workers的2倍
+        :param deadline: 上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间，超时后可从返回的offset续传
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示上传是否成功
+            offset: 已上传的数据大小
+            msg: 上传结果描述字符串
+        '''
+        path, name = get_path_and_name(obj_name)
+        return self._dir(bucket_name, path).put_stream(obj_name=name, stream=stream, chunk_size=chunk_size,
+                                                       workers=workers, max_in_flight=max_in_flight,
+                                                       deadline=deadline)
+
+    def put_bytes(self, bucket_name, obj_name, data, chunk_size=5*1024**2, workers=1, deadline=None):
+        '''
+        上传内存中的数据
+
+        :param bucket_nmae:  存储桶名称
+        :param obj_name:  对象全路径名称
+        :param data: bytes、bytearray或memoryview
+        :param chunk_size: 分片大小
+        :param workers: 并发上传分片的线程数，大于1时多个分片并发上传
+        :param deadline: 上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间，超时后可从返回的offset续传
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示上传是否成功
+            offset: 已上传的数据大小
+            msg: 上传结果描述字符串
+        '''
+        path, name = get_path_and_name(obj_name)
+        return self._dir(bucket_name, path).put_bytes(obj_name=name, data=data, chunk_size=chunk_size, workers=workers,
+                                                      deadline=deadline)
 
-    def download_object(self, bucket_name, obj_name, filename):
+    def download_object(self, bucket_name, obj_name, filename, workers=1, resume=False, chunk_size=5*1024**2,
+                        deadline=None):
         '''
         下载一个对象
 
         :param bucket_nmae:  存储桶名称
         :param obj_name:  对象全路径名称
         :param filename:  对象保存文件名绝对路径
+        :param workers: 并发下载分片的线程数，大于1时多个分片并发下载
+        :param resume: True时从文件filename已下载部分的末尾处继续下载，中断的下载不必从头开始
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(同一客户端的上传、下载分别共享一个AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param deadline: 下载的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间，超时后可从返回的offset续传
         :return:
             (ok, offset, msg)
             ok: True or False, 指示下载是否成功
@@ -642,7 +880,41 @@ class Client():
             msg: 下载结果描述字符串
         '''
         path, name = get_path_and_name(obj_name)
-        return Directory(bucket_name=bucket_name, cur_dir_path=path).download_object(obj_name=name, filename=filename)
+        return self._dir(bucket_name, path).download_object(obj_name=name, filename=filename, workers=workers,
+                                                            resume=resume, chunk_size=chunk_size, deadline=deadline)
+
+    def iter_object(self, bucket_name, obj_name, chunk_size=5*1024**2, prefetch=2, offset=0):
+        '''
+        流式读取一个对象的数据，后台预先下载之后的分片，不写入本地文件
+
+        :param bucket_name:  存储桶名称
+        :param obj_name:  对象全路径名称
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(同一客户端的上传、下载分别共享一个AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param prefetch: 后台预先下载的分片数，0为不预先下载
+        :param offset: 开始读取的偏移量
+        :return:
+            生成器，依次返回对象的数据分片bytes
+        :raises FileNotFoundError: 对象不存在
+        :raises IOError: 下载分片失败
+        '''
+        path, name = get_path_and_name(obj_name)
+        return self._dir(bucket_name, path).iter_object(obj_name=name, chunk_size=chunk_size, prefetch=prefetch,
+                                                        offset=offset)
+
+    def open_object(self, bucket_name, obj_name, block_size=1024**2, cache_blocks=32, readahead=2):
+        '''
+        以只读、可随机访问(seek)的文件对象方式打开一个对象
+
+        :param bucket_name:  存储桶名称
+        :param obj_name:  对象全路径名称
+        :param block_size: 数据块大小
+        :param cache_blocks: LRU缓存的数据块数量
+        :param readahead: 顺序读取时预先下载的数据块数量，0为不预先下载
+        :return:
+            HarborObjectReader()
+        '''
+        return HarborObjectReader(bucket_name=bucket_name, obj_name=obj_name, apicore=self.apicore,
+                                  block_size=block_size, cache_blocks=cache_blocks, readahead=readahead)
 
     def delete_object(self, bucket_name, obj_name):
         '''
@@ -655,7 +927,23 @@ class Client():
             failure: (False, msg)
         '''
         path, name = get_path_and_name(obj_name)
-        return Directory(bucket_name=bucket_name, cur_dir_path=path).delete_object(obj_name=name)
+        return self._dir(bucket_name, path).delete_object(obj_name=name)
+
+    def delete_objects(self, bucket_name, obj_names, concurrency=8):
+        '''
+        并发删除多个对象，按删除完成的顺序返回每个对象的结果
+
+        :param bucket_nmae:  存储桶名称
+        :param obj_names:  对象全路径名称的可迭代对象，可以是生成器，按需读取
+        :param concurrency: 同时进行的删除请求数
+        :return:
+            生成器，(obj_name, ok, msg)
+            ok: True or False, 指示删除是否成功
+            msg: 删除结果描述字符串
+        '''
+        results = self.apicore.delete_objs(bucket_name=bucket_name, obj_paths=obj_names, workers=concurrency)
+        for obj_name, ok, code, msg in results:
+            yield obj_name, ok, msg
 
     def share_object(self, bucket_name, obj_name, share=True, days=0):
         '''
@@ -671,7 +959,7 @@ class Client():
             msg: 请求结果描述字符串
         '''
         path, name = get_path_and_name(obj_name)
-        ok, msg = Directory(bucket_name=bucket_name, cur_dir_path=path).share_object(obj_name=name, share=share, days=days)
+        ok, msg = self._dir(bucket_name, path).share_object(obj_name=name, share=share, days=days)
         return ok, msg
 
     def create_dir(self, bucket_name, dir_name):
@@ -685,7 +973,7 @@ class Client():
             failure: (False, msg)
         '''
         path, name = get_path_and_name(dir_name)
-        return Directory(bucket_name=bucket_name, cur_dir_path=path).create_dir(dir_name=name)
+        return self._dir(bucket_name, path).create_dir(dir_name=name)
 
     def delete_dir(self, bucket_name, dir_name):
         '''
@@ -697,7 +985,42 @@ class Client():
             success: (True,  msg)
             failure: (False, msg)
         '''
-        return Directory(bucket_name=bucket_name, cur_dir_path=dir_name).delete()
+        return self._dir(bucket_name, dir_name).delete()
+
+    def rmtree(self, bucket_name, dir_name, concurrency=8, dry_run=False, callback=None):
+        '''
+        递归删除一个目录及其下所有的子目录和对象；并发删除对象，目录下的对象和子目录都删除后立即删除此目录
+
+        :param bucket_name:  存储桶名称
+        :param dir_name:  目录名全路径
+        :param concurrency: 并发列举和删除的线程数
+        :param dry_run: True时只遍历目录树，不删除，返回将要删除的对象和目录的统计
+        :param callback: 每个对象或目录删除后的回调函数callback(kind, path, ok, msg)，kind为'obj'或'dir'，可用于显示进度
+        :return:
+            (ok, stats)
+            ok: True or False, 指示是否全部删除成功
+            stats: {'objs': 删除的对象数, 'dirs': 删除的目录数, 'errors': [(path, msg), ...]}
+        '''
+        return self._dir(bucket_name, dir_name).rmtree(workers=concurrency, dry_run=dry_run, callback=callback)
+
+    def walk(self, bucket_name, top='', concurrency=8, per_page=1000, onerror=None):
+        '''
+        类似os.walk()遍历目录树，并发列举多个目录，自动获取每个目录的所有分页；
+        可以原地修改返回的subdirs列表，只遍历其中保留的子目录
+
+        :param bucket_name:  存储桶名称
+        :param top: 开始遍历的目录全路径，默认存储桶根目录
+        :param concurrency: 同时进行的列举目录请求数
+        :param per_page: 列举目录时每页获取的数量
+        :param onerror: 目录列举失败时的回调函数onerror(dir_path, msg)，默认忽略失败的目录
+        :return:
+            生成器，(dir_path, subdirs, objects)，按目录列举完成的顺序
+            dir_path: 目录全路径
+            subdirs: 子目录名称列表
+            objects: 对象名称列表
+        '''
+        return self.apicore.walk(bucket_name=bucket_name, top=top, workers=concurrency, per_page=per_page,
+                                 onerror=onerror)
 
     def get_buckets(self):
         '''
@@ -707,7 +1030,7 @@ class Client():
             data: 请求成功时字典类型的数据，失败时为None
             msg: 请求结果描述字符串
         '''
-        data, _, msg = ApiCore().get_buckets()
+        data, _, msg = self.apicore.get_buckets()
         if not data:
             return None, msg
 
@@ -723,7 +1046,7 @@ class Client():
             ok: True or False, 指示请求是否成功
             msg: 请求结果描述字符串
         '''
-        return Bucket(bucket_name).set_permission(public=public)
+        return self.bucket(bucket_name).set_permission(public=public)
 
     def list_dir(self, bucket_name, dir_name='', per_page=None):
         '''
@@ -736,7 +1059,23 @@ class Client():
             success: ListDirPage()
             failed: None    网路问题或目录不存在等请求失败
         '''
-        return Directory(bucket_name=bucket_name, cur_dir_path=dir_name).list(per_page=per_page)
+        return self._dir(bucket_name, dir_name).list(per_page=per_page)
+
+    def iter_dir(self, bucket_name, dir_name='', per_page=1000, prefetch=2, workers=1):
+        '''
+        依次返回目录下所有的子目录和对象信息，自动获取所有分页，后台线程预先获取之后的分页
+
+        :param bucket_name:  存储桶名称
+        :param dir_name:  目录名全路径
+        :param per_page:  每页获取的数量
+        :param prefetch: 后台预先获取的页数，0为不预先获取
+        :param workers: 并发获取分页的线程数，大于1时获取第一页后按总数count同时获取其余的分页
+        :return:
+            生成器，依次返回子目录或对象的信息字典，'fod'为True时是对象
+        :raises FileNotFoundError: 目录不存在
+        :raises IOError: 获取分页失败
+        '''
+        return self._dir(bucket_name, dir_name).iter_entries(per_page=per_page, prefetch=prefetch, workers=workers)
 
     def write_one_chunk(self, bucket_name, obj_name, offset, chunk):
         '''
@@ -751,7 +1090,7 @@ class Client():
             failure: (False, msg)
             可能参数有误，目录路径不存在等各种原因不具备上传条件: (None, msg)
         '''
-        ok, code, msg = ApiCore().write_one_chunk(bucket_name=bucket_name, path=obj_name, obj_name='', offset=offset, chunk=chunk)
+        ok, code, msg = self.apicore.write_one_chunk(bucket_name=bucket_name, path=obj_name, obj_name='', offset=offset, chunk=chunk)
         return ok, msg
 
     def read_one_chunk(self, bucket_name, obj_name, offset, size):
@@ -770,7 +1109,7 @@ class Client():
             failure: (False, msg)
             404: (None, msg) 资源不存在
         '''
-        return ApiCore().read_one_chunk(bucket_name=bucket_name, path=obj_name, obj_name='', offset=offset, size=size)
+        return self.apicore.read_one_chunk(bucket_name=bucket_name, path=obj_name, obj_name='', offset=offset, size=size)
 
     def move_object(self, bucket_name, obj_name, to, rename=None):
         '''
@@ -789,7 +1128,7 @@ class Client():
                 }
         '''
         path, name = get_path_and_name(obj_name)
-        return Directory(bucket_name=bucket_name, cur_dir_path=path).move_object(obj_name=name, to=to, rename=rename)
+        return self._dir(bucket_name, path).move_object(obj_name=name, to=to, rename=rename)
 
     def rename_object(self, bucket_name, obj_name, rename):
         '''
@@ -807,7 +1146,7 @@ class Client():
                 }
         '''
         path, name = get_path_and_name(obj_name)
-        return Directory(bucket_name=bucket_name, cur_dir_path=path).rename_object(obj_name=name, rename=rename)
+        return self._dir(bucket_name, path).rename_object(obj_name=name, rename=rename)
 
     def isdir(self, bucket_name, dir_name):
         '''
@@ -856,7 +1195,7 @@ class Client():
             code: 请求返回的状态码或None
             msg: 结果描述字符串
         '''
-        return ApiCore().get_metadata(bucket_name=bucket_name, path=filename)
+        return self.apicore.get_metadata(bucket_name=bucket_name, path=filename)
 
 
 
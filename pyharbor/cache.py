@@ -0,0 +1,253 @@
+import threading
+import time
+from collections import OrderedDict
+
+from .config import configs
+
+
+class TTLCache():
+    '''
+    有过期时间(TTL)和容量上限的LRU缓存，可在多线程间共享
+
+    每项缓存ttl秒后过期，缓存项数超过maxsize时淘汰最久未使用的项
+    '''
+    def __init__(self, maxsize=10000, ttl=60):
+        '''
+        :param maxsize: 最多缓存的项数，0为不缓存
+        :param ttl: 每项缓存的有效时间(秒)
+        '''
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._cache = OrderedDict()     # {key: (value, expire time)}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __str__(self):
+        return '{0}(size={1}, maxsize={2}, ttl={3})'.format(type(self).__name__, len(self), self.maxsize, self.ttl)
+
+    def get(self, key, default=None):
+        '''
+        :return:
+            缓存的有效值，无有效值时返回default
+        '''
+        with self._lock:
+            item = self._cache.get(key)
+            if item is None:
+                return default
+
+            value, expire = item
+            if time.monotonic() >= expire:
+                del self._cache[key]
+                return default
+
+            self._cache.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+
+        expire = time.monotonic() + self.ttl
+        with self._lock:
+            self._cache[key] = (value, expire)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._cache.pop(key, None)
+
+        return default if item is None else item[0]
+
+    def pop_where(self, predicate):
+        '''
+        删除键满足条件的所有项
+
+        :param predicate: 判断函数predicate(key)
+        '''
+        with self._lock:
+            for key in [k for k in self._cache if predicate(k)]:
+                del self._cache[key]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+class PathCache(TTLCache):
+    '''
+    以(存储桶名称, 路径)为键的缓存
+    '''
+    @staticmethod
+    def make_key(bucket_name, path):
+        return (bucket_name, path.strip('/'))
+
+    def invalidate(self, bucket_name, path, recursive=False):
+        '''
+        使路径的缓存失效
+
+        :param recursive: True时同时使路径下所有子路径的缓存失效
+        '''
+        bucket_name, path = self.make_key(bucket_name, path)
+        self.pop((bucket_name, path))
+        if recursive:
+            prefix = path + '/' if path else ''
+            self.pop_where(lambda key: key[0] == bucket_name and key[1].startswith(prefix))
+
+
+class MetadataCache(PathCache):
+    '''
+    对象和目录元数据的缓存，键为(存储桶名称, 路径)
+
+    缓存get_metadata()的成功结果和不存在(404)的结果；同一客户端的上传、删除、移动、重命名、分享等写操作
+    使相关路径的缓存失效，列举目录的结果填充其中每一项的缓存；其他客户端的修改在ttl秒内可能不可见
+    '''
+    def get_metadata(self, bucket_name, path):
+        '''
+        :return:
+            缓存的get_metadata()结果(data, code, msg)，无缓存时返回None
+        '''
+        return self.get(self.make_key(bucket_name, path))
+
+    def set_metadata(self, bucket_name, path, result):
+        '''
+        :param result: get_metadata()的结果(data, code, msg)
+        '''
+        self.set(self.make_key(bucket_name, path), result)
+
+    def fill_from_listing(self, bucket_name, dir_path, files):
+        '''
+        用列举目录的结果填充其中每一项的缓存
+
+        :param bucket_name: 存储桶名称
+        :param dir_path: 目录路径
+        :param files: 列举目录返回的对象和子目录信息列表
+        '''
+        if self.maxsize <= 0:
+            return
+
+        dir_path = (dir_path or '').strip('/')
+        for f in files:
+            path = '/'.join([dir_path, f.get('name', '')]).lstrip('/')
+            data = {'code': 200, 'bucket_name': bucket_name, 'dir_path': dir_path, 'data': f}
+            self.set((bucket_name, path), (data, 200, 'Get metedata successful.'))
+
+
+class DirectoryCache(PathCache):
+    '''
+    已知存在的目录的缓存，键为(存储桶名称, 目录路径)
+
+    创建目录成功(包括目录已存在)和列举目录的结果填充缓存，同一客户端删除目录、上传失败或列举目录返回404
+    使其及其子目录的缓存失效；
+    create_path()只创建路径中缓存里没有的部分，其他客户端删除了缓存的目录导致父目录不存在时，
+    使其缓存失效并从头创建整个路径
+    '''
+    def __init__(self, maxsize=100000, ttl=None):
+        '''
+        :param maxsize: 最多缓存的目录数
+        :param ttl: 每项缓存的有效时间(秒)，默认configs.DIR_CACHE_TTL，0为不缓存
+        '''
+        if ttl is None:
+            ttl = configs.DIR_CACHE_TTL or 0
+        super().__init__(maxsize=maxsize if ttl > 0 else 0, ttl=ttl)
+
+    def exists(self, bucket_name, dir_path):
+        '''
+        :return:
+            True: 目录已知存在，存储桶根目录总是存在
+            False: 未知
+        '''
+        key = self.make_key(bucket_name, dir_path)
+        return not key[1] or self.get(key) is not None
+
+    def add(self, bucket_name, dir_path):
+        '''
+        记录目录及其所有父目录存在
+        '''
+        if self.maxsize <= 0:
+            return
+
+        bucket_name, path = self.make_key(bucket_name, dir_path)
+        while path:
+            self.set((bucket_name, path), True)
+            path = path.rpartition('/')[0]
+
+    def fill_from_listing(self, bucket_name, dir_path, files):
+        '''
+        用列举目录的结果填充缓存，目录本身和其中的子目录都存在
+
+        :param bucket_name: 存储桶名称
+        :param dir_path: 目录路径
+        :param files: 列举目录返回的对象和子目录信息列表
+        '''
+        if self.maxsize <= 0:
+            return
+
+        dir_path = (dir_path or '').strip('/')
+        self.add(bucket_name, dir_path)
+        for f in files:
+            if not f.get('fod') and f.get('name'):
+                self.set((bucket_name, '/'.join([dir_path, f['name']]).lstrip('/')), True)
+
+    def missing(self, bucket_name, breadcrumb):
+        '''
+        路径中需要创建的部分
+
+        :param breadcrumb: get_path_breadcrumb()返回的路径面包屑
+        :return:
+            breadcrumb中最深的已知存在的目录之后的部分
+        '''
+        for i in range(len(breadcrumb) - 1, -1, -1):
+            dir_name, p_dir_path = breadcrumb[i]
+            if self.exists(bucket_name, '/'.join([p_dir_path, dir_name])):
+                return breadcrumb[i + 1:]
+
+        return breadcrumb
+
+    def replan(self, bucket_name, breadcrumb, todo, failed, code):
+        '''
+        create_path()创建todo中的目录failed失败后，返回需要重新创建的部分
+
+        父目录不存在(400、404)而todo跳过了缓存中的目录时，缓存的目录可能已被其他客户端删除，
+        使父目录的缓存失效后从头创建整个路径一次
+
+        :param breadcrumb: get_path_breadcrumb()返回的路径面包屑
+        :param todo: 本次创建的部分，missing()或replan()的返回值
+        :param failed: 创建失败的(dir_name, p_dir_path)
+        :param code: 创建失败的状态码
+        :return:
+            需要重新创建的部分，None表示创建失败
+        '''
+        if len(todo) == len(breadcrumb) or code not in (400, 404):
+            return None
+
+        self.invalidate(bucket_name, failed[1], recursive=True)
+        return breadcrumb
+
+
+class BucketIdCache(TTLCache):
+    '''
+    存储桶名称到id的映射缓存，一次获取存储桶列表的结果填充所有存储桶的映射
+    '''
+    def __init__(self, maxsize=10000, ttl=None):
+        '''
+        :param maxsize: 最多缓存的存储桶数
+        :param ttl: 每项缓存的有效时间(秒)，默认configs.BUCKET_ID_TTL
+        '''
+        if ttl is None:
+            ttl = configs.BUCKET_ID_TTL or 300
+        super().__init__(maxsize=maxsize, ttl=ttl)
+
+    def fill(self, data):
+        '''
+        用获取存储桶列表的结果填充缓存
+
+        :param data: get_buckets()返回的数据
+        '''
+        for b in (data or {}).get('buckets') or []:
+            name, bid = b.get('name'), b.get('id')
+            if name and bid is not None:
+                self.set(name, bid)
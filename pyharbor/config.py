@@ -8,6 +8,14 @@ DEFAULT_CONFIGS = {
     'BUCKET_API_PREFIX': 'buckets',
     'MOVE_API_PREFIX': 'move',
     'METADATA_API_PREFIX': 'metadata',
+    'POOL_CONNECTIONS': 10,     # 连接池缓存的主机(host)连接池数量
+    'POOL_MAXSIZE': 10,         # 每个主机(host)连接池保持的最大连接数
+    'POOL_BLOCK': False,        # 连接数达到POOL_MAXSIZE时是否阻塞等待空闲连接
+    'AIO_LIMIT': 100,           # 异步客户端AsyncClient连接池的最大连接数
+    'CONNECT_TIMEOUT': 10,      # 建立连接的超时时间(秒)，None为不超时
+    'READ_TIMEOUT': 60,         # 等待服务器响应数据的超时时间(秒)，None为不超时
+    'BUCKET_ID_TTL': 300,       # 缓存的存储桶名称到id映射的有效时间(秒)
+    'DIR_CACHE_TTL': 300,       # 缓存的已知存在目录的有效时间(秒)，0为不缓存，create_path()据此跳过已存在的目录
 }
 
 def set_global_settings(settings):
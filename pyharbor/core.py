@@ -1,27 +1,345 @@
+import mmap
 import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from . import request
 from . import configs
 from .config import join_url_with_slash
+from .multipart import ChunkFormData
+from .retry import RetryPolicy
+from .deadline import Deadline
+from .listing import CompactListing
+from .cache import BucketIdCache, DirectoryCache
 
 
+MAX_CHUNK_SIZE = 20*1024**2     # 服务器允许的分片大小上限
+
+
+class AdaptiveChunkSize():
+    '''
+    根据每个分片的传输耗时和成败自适应调整分片大小，可在多线程间共享
+
+    分片传输成功时，按测得的吞吐量把分片大小向"target_seconds秒能传输的数据量"调整；
+    分片传输失败时分片大小减半，减少不稳定网络中失败重传的数据量
+    '''
+    def __init__(self, initial=5*1024**2, min_size=256*1024, max_size=MAX_CHUNK_SIZE, target_seconds=2.0):
+        '''
+        :param initial: 初始分片大小
+        :param min_size: 分片大小下限
+        :param max_size: 分片大小上限，不能超过服务器的限制MAX_CHUNK_SIZE(20MB)
+        :param target_seconds: 期望的单个分片传输耗时
+        '''
+        self.max_size = min(max_size, MAX_CHUNK_SIZE)
+        self.min_size = min(min_size, self.max_size)
+        self.target_seconds = target_seconds
+        self._size = self._clamp(initial)
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return 'AdaptiveChunkSize({0})'.format(self._size)
+
+    @property
+    def chunk_size(self):
+        return self._size
+
+    def _clamp(self, size):
+        size = size // (64*1024) * (64*1024)  # 64KB对齐
+        return max(self.min_size, min(self.max_size, int(size)))
+
+    def observe(self, size, seconds, ok):
+        '''
+        记录一个分片的传输结果，调整分片大小
+
+        :param size: 分片大小
+        :param seconds: 传输耗时
+        :param ok: 是否传输成功
+        '''
+        with self._lock:
+            if not ok:
+                self._size = self._clamp(self._size // 2)
+            elif size > 0:
+                ideal = size / max(seconds, 1e-3) * self.target_seconds
+                self._size = self._clamp((self._size + ideal) / 2)
+
+def get_chunk_size(chunk_size):
+    '''
+    当前的分片大小
+
+    :param chunk_size: int或者AdaptiveChunkSize()
+    '''
+    if isinstance(chunk_size, int):
+        return chunk_size
+    return chunk_size.chunk_size
+
+def make_chunk_size(chunk_size, auto=None):
+    '''
+    :param chunk_size: int，AdaptiveChunkSize()，或者'auto'表示使用auto
+    :param auto: chunk_size为'auto'时使用的AdaptiveChunkSize()，默认新建一个
+    '''
+    if chunk_size == 'auto':
+        return auto or AdaptiveChunkSize()
+    return chunk_size
+
+def chunk_observer(chunk_size, size=None):
+    '''
+    自适应分片大小时，返回记录分片每次请求尝试(包括重试)传输结果的request.request()参数on_attempt，否则返回None
+
+    连接错误、超时和5xx、408、429状态码视为传输失败，其他4xx状态码不计入
+
+    :param chunk_size: int或者AdaptiveChunkSize()
+    :param size: 上传的分片大小，None时为下载的响应体大小
+    '''
+    if not isinstance(chunk_size, AdaptiveChunkSize):
+        return None
+
+    def on_attempt(response, exception, seconds):
+        if exception is not None:
+            ok = False
+        elif response.status_code >= 500 or response.status_code in (408, 429):
+            ok = False
+        elif response.status_code >= 400:
+            return
+        else:
+            ok = True
+
+        n = size
+        if n is None:
+            n = len(response.content) if ok else 0
+        chunk_size.observe(size=n, seconds=seconds, ok=ok)
+
+    return on_attempt
+
 def chunks(fd, offset=0, chunk_size=5*1024**2):
     '''
     Read the file and yield chunks of ``chunk_size`` bytes
 
     :param fd: 文件描述符(file descriptor)
     :param offset: 开始读取的偏移量
-    :param chunk_size: 分片大小
+    :param chunk_size: 分片大小，int或者AdaptiveChunkSize()
     :return:
     '''
     fd.seek(offset)
 
     while True:
-        data = fd.read(chunk_size)
+        data = fd.read(get_chunk_size(chunk_size))
         if not data:
             break
         yield data
 
+def offset_chunks(fd, offset=0, chunk_size=5*1024**2):
+    '''
+    Read the file and yield (offset, chunk) of ``chunk_size`` bytes
+
+    :param fd: 文件描述符(file descriptor)
+    :param offset: 开始读取的偏移量
+    :param chunk_size: 分片大小，int或者AdaptiveChunkSize()
+    :return:
+    '''
+    for chunk in chunks(fd, offset=offset, chunk_size=chunk_size):
+        yield offset, chunk
+        offset += len(chunk)
+
+def mmap_offset_chunks(fd, offset=0, chunk_size=5*1024**2):
+    '''
+    内存映射(mmap)文件，yield (offset, chunk)，chunk为映射内存的memoryview切片，不拷贝文件数据；
+    上传过程中文件不能被修改或截断
+
+    :param fd: 文件描述符(file descriptor)
+    :param offset: 开始读取的偏移量
+    :param chunk_size: 分片大小，int或者AdaptiveChunkSize()
+    :return:
+    '''
+    size = get_size(fd)
+    if size <= offset:
+        return
+
+    mm = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    try:
+        while offset < size:
+            chunk = view[offset:offset + get_chunk_size(chunk_size)]
+            yield offset, chunk
+            offset += len(chunk)
+    finally:
+        view.release()
+        try:
+            mm.close()
+        except BufferError:     # 仍有分片在使用中，由垃圾回收关闭
+            pass
+
+def chunks_of_reader(read, chunk_size=5*1024**2):
+    '''
+    调用read(chunk_size)读取数据直到没有数据，不需要seek
+
+    :param read: 文件类对象的read方法
+    :param chunk_size: 每次读取的大小，int或者AdaptiveChunkSize()
+    :return:
+    '''
+    while True:
+        data = read(get_chunk_size(chunk_size))
+        if not data:
+            break
+        yield data
+
+def stream_chunks(stream, chunk_size=5*1024**2):
+    '''
+    把内存中的数据或数据流重新分割为chunk_size大小的分片，最后一个分片可能小于chunk_size
+
+    :param stream: bytes、bytearray、memoryview，有read()方法的文件类对象(不需要支持seek)，或者返回bytes的迭代器
+    :param chunk_size: 分片大小，int或者AdaptiveChunkSize()
+    :return:
+    '''
+    if isinstance(stream, (bytes, bytearray, memoryview)):
+        view = memoryview(stream).cast('B')
+        while view:
+            n = get_chunk_size(chunk_size)
+            yield view[:n]
+            view = view[n:]
+        return
+
+    if hasattr(stream, 'read'):
+        stream = chunks_of_reader(stream.read, chunk_size=chunk_size)
+
+    buf = bytearray()
+    for data in stream:
+        if not data:
+            continue
+
+        buf += data
+        while len(buf) >= get_chunk_size(chunk_size):
+            n = get_chunk_size(chunk_size)
+            yield bytes(buf[:n])
+            del buf[:n]
+
+    if buf:
+        yield bytes(buf)
+
+def offset_chunks_of_stream(stream, offset=0, chunk_size=5*1024**2):
+    '''
+    把内存中的数据或数据流重新分割为分片，yield (offset, chunk)；没有数据时yield一个空分片(offset, b'')，
+    以便上传空对象
+
+    :param stream: bytes、bytearray、memoryview，有read()方法的文件类对象(不需要支持seek)，或者返回bytes的迭代器
+    :param offset: 第一个分片的偏移量
+    :param chunk_size: 分片大小，int或者AdaptiveChunkSize()
+    :return:
+    '''
+    empty = True
+    for chunk in stream_chunks(stream, chunk_size=chunk_size):
+        empty = False
+        yield offset, chunk
+        offset += len(chunk)
+
+    if empty:
+        yield offset, b''
+
+def iter_completed(executor, fn, items, max_in_flight):
+    '''
+    提交任务到线程池执行，同时进行的任务数不超过max_in_flight，按任务完成的顺序返回结果；
+    生成器被关闭时未开始执行的任务会被取消
+
+    :param executor: 线程池
+    :param fn: 任务函数，参数为items中的一项
+    :param items: 任务参数迭代器
+    :param max_in_flight: 同时进行的任务数上限
+    :return:
+        (item, result)
+    '''
+    pending = {}
+    items = iter(items)
+    try:
+        while True:
+            for item in items:
+                pending[executor.submit(fn, item)] = item
+                if len(pending) >= max_in_flight:
+                    break
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+def iter_prefetched(items, prefetch=2):
+    '''
+    在后台线程中迭代items，预先取出最多prefetch项，调用者处理当前项时后台线程获取之后的项；
+    items迭代时抛出的异常在调用者迭代到此处时抛出；生成器被关闭时后台线程停止迭代
+
+    :param items: 可迭代对象
+    :param prefetch: 预先取出的项数，0为不使用后台线程
+    :return:
+        生成器，依次返回items中的项
+    '''
+    if prefetch <= 0:
+        yield from items
+        return
+
+    end = object()
+    buffer = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((True, item)):
+                    return
+        except Exception as e:
+            put((False, e))
+            return
+        put((True, end))
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            ok, item = buffer.get()
+            if not ok:
+                raise item
+            if item is end:
+                return
+            yield item
+    finally:
+        stop.set()
+
+_write_lock = threading.Lock()
+
+def write_at(fd, data, offset):
+    '''
+    在文件的offset处写入数据，不依赖也不改变文件的当前偏移量，可多线程同时写入
+
+    :param fd: os.open()返回的文件描述符
+    :param data: 要写入的数据
+    :param offset: 写入的偏移量
+    :return:
+    '''
+    data = memoryview(data)
+    if hasattr(os, 'pwrite'):
+        while data:
+            n = os.pwrite(fd, data, offset)
+            data = data[n:]
+            offset += n
+    else:
+        with _write_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            while data:
+                n = os.write(fd, data)
+                data = data[n:]
+
 def get_size(fd):
     '''
     获取文件大小
@@ -162,8 +480,51 @@ class ApiCore():
     '''
     EVHarbor API 封装
     '''
-    def __init__(self):
+    def __init__(self, session=None, retry=None, metadata_cache=None):
+        '''
+        :param session: 发送请求使用的连接池会话request.HarborSession，默认使用进程内共享的会话
+                        request.get_default_session()，此会话在多线程间共享，进程退出前不关闭，
+                        fork出的子进程中使用子进程自己的默认会话；指定的会话由调用者负责关闭，
+                        不应在fork前后的进程间共用
+        :param retry: 所有请求使用的重试策略RetryPolicy，默认RetryPolicy()；RetryPolicy(max_attempts=1)为不重试
+        :param metadata_cache: 元数据缓存MetadataCache，get_metadata()优先使用缓存，默认不缓存
+        '''
         self._url_builder = ApiUrlBuilder()
+        self._session = session
+        self.retry = retry or RetryPolicy()
+        self.metadata_cache = metadata_cache
+        self.bucket_ids = BucketIdCache()       # 存储桶名称到id的映射
+        self._bucket_ids_lock = threading.Lock()
+        self.dir_cache = DirectoryCache()       # 已知存在的目录
+        # chunk_size='auto'时此客户端所有上传、下载分别共享的自适应分片大小
+        self.upload_chunk_size = AdaptiveChunkSize()
+        self.download_chunk_size = AdaptiveChunkSize()
+
+    @property
+    def session(self):
+        # 未指定会话时每次获取当前进程的默认会话，fork后不使用父进程的连接
+        return self._session or request.get_default_session()
+
+    @session.setter
+    def session(self, value):
+        self._session = value
+
+    def _invalidate_metadata(self, bucket_name, path, *names, recursive=False):
+        '''
+        写操作后使路径的元数据缓存失效
+
+        :param names: 拼接在path之后的路径部分，如对象名称
+        '''
+        if self.metadata_cache is not None:
+            self.metadata_cache.invalidate(bucket_name, join_url_with_slash(path, *names), recursive=recursive)
+
+    def _invalidate_dir(self, bucket_name, path):
+        '''
+        上传或列举时目录不存在，目录可能已被其他客户端删除，使其及其子目录的缓存失效，之后的create_path()重新创建
+
+        :param path: 目录路径
+        '''
+        self.dir_cache.invalidate(bucket_name, path, recursive=True)
 
     def upload_one_chunk(self, obj_url, offset, chunk, **kwargs):
         '''
@@ -171,16 +532,22 @@ class ApiCore():
 
         :param obj_url: 对象url
         :param offset: 分片偏移量
-        :param chunk: 分片
+        :param chunk: 分片，bytes、memoryview或者二进制方式打开的文件描述符；请求体分段流式发送，不拷贝分片数据
+        :param kwargs: request.request()的其他参数，如deadline、timeout
         :return:
             success: (True, code, msg)
             failure: (False, code, msg)
             可能参数有误，目录路径不存在等各种原因不具备上传条件: (None, 0, msg)
         '''
+        # 分段流式发送请求体，不在内存中拼接整个multipart请求体
+        body = ChunkFormData(offset=offset, chunk=chunk)
+        headers = kwargs.pop('headers', {})
+        headers['Content-Type'] = body.content_type
         try:
-            r = request.post(obj_url, files={'chunk': chunk},
-                data={"chunk_offset": offset, "chunk_size": len(chunk)}, **kwargs)
-        except request.ConnectionError as e:
+            # 分片按偏移量写入，重复发送的结果相同，可以重试
+            r = request.post(obj_url, data=body, headers=headers, session=self.session, retry=self.retry,
+                             idempotent=True, **kwargs)
+        except request.RequestException as e:
             return (False, 0, str(e))
 
         msg = get_response_msg(r)
@@ -202,50 +569,206 @@ class ApiCore():
         :param path:  对象所在目录路径
         :param obj_name: 对象名称
         :param offset: 分片偏移量
-        :param chunk: 分片
+        :param chunk: 分片，bytes、memoryview或者二进制方式打开的文件描述符
         :return:
             success: (True, code, msg)
             failure: (False, code, msg)
             可能参数有误，目录路径不存在等各种原因不具备上传条件: (None, 0, msg)
         '''
         obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
-        return self.upload_one_chunk(obj_url=obj_url, offset=offset, chunk=chunk, **kwargs)
-
-    def upload_obj_by_url(self, obj_url, filename, start=0):
+        result = self.upload_one_chunk(obj_url=obj_url, offset=offset, chunk=chunk, **kwargs)
+        self._invalidate_metadata(bucket_name, path, obj_name)
+        if result[1] == 404:
+            self._invalidate_dir(bucket_name, path)
+        return result
+
+    def upload_obj_by_url(self, obj_url, filename, start=0, workers=1, max_in_flight=None, callback=None,
+                          use_mmap=False, chunk_size=5*1024**2, deadline=None):
         '''
         上传一个文件
 
         :param obj_url: 对象url
         :param filename: 要上传文件的绝对路径
         :param start: 开始上传的偏移量
+        :param workers: 并发上传分片的线程数，大于1时多个分片并发上传
+        :param max_in_flight: 并发上传时已读取未完成上传的分片数上限，默认workers的2倍
+        :param callback: 每个分片上传成功后的回调函数callback(offset, size)
+        :param use_mmap: True时内存映射(mmap)文件，分片数据不经拷贝直接发送，减少内存占用和CPU消耗；
+                        上传过程中文件不能被修改或截断
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(上传、下载分别共享ApiCore的AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param deadline: 整个上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时上传失败，返回的offset可以用于续传
         :return:
             (ok, offset, msg)
             ok: True or False, 指示上传是否成功
-            offset: 已上传文件的偏移量
+            offset: 已上传文件的偏移量，并发上传时为从start开始连续上传成功的偏移量
             msg: 上传结果描述字符串
 
         '''
         if not os.path.exists(filename):
             raise FileNotFoundError()
 
-        offset = start
+        chunk_size = make_chunk_size(chunk_size, auto=self.upload_chunk_size)
+        deadline = Deadline.make(deadline)
         with open(filename, 'rb') as f:
-            size = get_size(f)
-            for chunk in chunks(f, offset=start):
-                if not chunk:
-                    if offset >= size:
-                        break
-                    continue
+            if use_mmap:
+                items = mmap_offset_chunks(f, offset=start, chunk_size=chunk_size)
+            else:
+                items = offset_chunks(f, offset=start, chunk_size=chunk_size)
+            if workers and workers > 1:
+                return self._upload_chunks_concurrently(obj_url=obj_url, items=items, start=start, workers=workers,
+                                                        max_in_flight=max_in_flight, callback=callback,
+                                                        chunk_size=chunk_size, deadline=deadline)
+
+            return self._upload_chunks(obj_url=obj_url, items=items, start=start, callback=callback,
+                                       chunk_size=chunk_size, deadline=deadline)
+
+    def _upload_one_chunk_observed(self, obj_url, offset, chunk, chunk_size=None, deadline=None):
+        '''
+        上传一个分片，自适应分片大小时记录分片每次请求尝试的传输耗时和结果
+
+        :param chunk_size: 分片大小，int或者AdaptiveChunkSize()
+        :param deadline: 截止时间Deadline()
+        '''
+        return self.upload_one_chunk(obj_url=obj_url, offset=offset, chunk=chunk, deadline=deadline,
+                                     on_attempt=chunk_observer(chunk_size, size=len(chunk)))
 
-                ok, code, msg = self.upload_one_chunk(obj_url=obj_url, offset=offset, chunk=chunk)
+    def _upload_chunks(self, obj_url, items, start=0, callback=None, chunk_size=None, deadline=None):
+        '''
+        依次上传分片
+
+        :param obj_url: 对象url
+        :param items: 分片迭代器，依次返回从start开始连续的(offset, chunk)
+        :param start: 开始上传的偏移量
+        :param callback: 每个分片上传成功后的回调函数callback(offset, size)
+        :param chunk_size: 分片大小，AdaptiveChunkSize()时记录每个分片的传输结果
+        :param deadline: 截止时间Deadline()
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示上传是否成功
+            offset: 已上传的偏移量
+            msg: 上传结果描述字符串
+        '''
+        committed = start
+        for offset, chunk in items:
+            ok, code, msg = self._upload_one_chunk_observed(obj_url=obj_url, offset=offset, chunk=chunk,
+                                                            chunk_size=chunk_size, deadline=deadline)
+            if not ok:
+                return False, committed, 'upload failed:' + msg
+
+            if callback is not None:
+                callback(offset, len(chunk))
+            committed = offset + len(chunk)
+
+        return True, committed, 'upload successfull'
+
+    def _upload_chunks_concurrently(self, obj_url, items, start=0, workers=4, max_in_flight=None, callback=None,
+                                    chunk_size=None, deadline=None):
+        '''
+        多线程并发上传分片，各线程上传互不重叠的分片
+
+        :param obj_url: 对象url
+        :param items: 分片迭代器，依次返回从start开始连续的(offset, chunk)
+        :param start: 开始上传的偏移量
+        :param workers: 并发上传分片的线程数
+        :param max_in_flight: 已读取未完成上传的分片数上限，默认workers的2倍
+        :param callback: 每个分片上传成功后的回调函数callback(offset, size)，分片完成的顺序不确定
+        :param chunk_size: 分片大小，AdaptiveChunkSize()时记录每个分片的传输结果
+        :param deadline: 截止时间Deadline()
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示上传是否成功
+            offset: 从start开始连续上传成功的偏移量，可以从此偏移量续传
+            msg: 上传结果描述字符串
+        '''
+        max_in_flight = max_in_flight or workers * 2
+        committed = start   # 从start开始连续上传成功的偏移量
+        acked = {}          # 已上传成功但与committed不连续的分片, {offset: end}
+
+        def upload(item):
+            offset, chunk = item
+            return self._upload_one_chunk_observed(obj_url=obj_url, offset=offset, chunk=chunk, chunk_size=chunk_size,
+                                                   deadline=deadline)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = iter_completed(executor, upload, items, max_in_flight=max_in_flight)
+            for (offset, chunk), (ok, code, msg) in results:
                 if not ok:
-                    return False, offset, 'upload failed:' + msg
+                    results.close()
+                    return False, committed, 'upload failed:' + msg
 
-                offset += len(chunk)
+                if callback is not None:
+                    callback(offset, len(chunk))
+                acked[offset] = offset + len(chunk)
+                while committed in acked:
+                    committed = acked.pop(committed)
 
-            return True, offset, 'upload successfull'
+        return True, committed, 'upload successfull'
 
-    def upload_obj(self, bucket_name, path, obj_name, filename, start=0):
+    def upload_stream_by_url(self, obj_url, stream, start=0, chunk_size=5*1024**2, workers=1, max_in_flight=None,
+                             callback=None, deadline=None):
+        '''
+        上传内存中的数据或数据流，不需要本地文件，数据总大小可以未知
+
+        :param obj_url: 对象url
+        :param stream: bytes、bytearray、memoryview，有read()方法的文件类对象(不需要支持seek)，或者返回bytes的迭代器
+        :param start: 数据写入对象的起始偏移量
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(上传、下载分别共享ApiCore的AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param workers: 并发上传分片的线程数，大于1时多个分片并发上传
+        :param max_in_flight: 并发上传时已读取未完成上传的分片数上限，默认workers的2倍
+        :param callback: 每个分片上传成功后的回调函数callback(offset, size)
+        :param deadline: 整个上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时上传失败，返回的offset可以用于续传
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示上传是否成功
+            offset: 已上传到对象的偏移量
+            msg: 上传结果描述字符串
+        '''
+        chunk_size = make_chunk_size(chunk_size, auto=self.upload_chunk_size)
+        deadline = Deadline.make(deadline)
+        items = offset_chunks_of_stream(stream, offset=start, chunk_size=chunk_size)
+        if workers and workers > 1:
+            return self._upload_chunks_concurrently(obj_url=obj_url, items=items, start=start, workers=workers,
+                                                    max_in_flight=max_in_flight, callback=callback,
+                                                    chunk_size=chunk_size, deadline=deadline)
+
+        return self._upload_chunks(obj_url=obj_url, items=items, start=start, callback=callback,
+                                   chunk_size=chunk_size, deadline=deadline)
+
+    def upload_stream(self, bucket_name, path, obj_name, stream, start=0, chunk_size=5*1024**2, workers=1,
+                      max_in_flight=None, callback=None, deadline=None):
+        '''
+        上传内存中的数据或数据流，不需要本地文件，数据总大小可以未知
+
+        :param bucket_name: 存储桶名称
+        :param path: 目录路径
+        :param obj_name: 对象名称
+        :param stream: bytes、bytearray、memoryview，有read()方法的文件类对象(不需要支持seek)，或者返回bytes的迭代器
+        :param start: 数据写入对象的起始偏移量
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(上传、下载分别共享ApiCore的AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param workers: 并发上传分片的线程数，大于1时多个分片并发上传
+        :param max_in_flight: 并发上传时已读取未完成上传的分片数上限，默认workers的2倍
+        :param callback: 每个分片上传成功后的回调函数callback(offset, size)
+        :param deadline: 整个上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时上传失败，返回的offset可以用于续传
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示上传是否成功
+            offset: 已上传到对象的偏移量
+            msg: 上传结果描述字符串
+        '''
+        obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
+        result = self.upload_stream_by_url(obj_url=obj_url, stream=stream, start=start, chunk_size=chunk_size,
+                                           workers=workers, max_in_flight=max_in_flight, callback=callback,
+                                           deadline=deadline)
+        self._invalidate_metadata(bucket_name, path, obj_name)
+        if not result[0]:
+            self._invalidate_dir(bucket_name, path)
+        return result
+
+    def upload_obj(self, bucket_name, path, obj_name, filename, start=0, workers=1, max_in_flight=None,
+                   callback=None, use_mmap=False, chunk_size=5*1024**2, deadline=None):
         '''
         上传一个文件
 
@@ -254,6 +777,13 @@ class ApiCore():
         :param obj_name: 对象名称
         :param filename: 要上传文件的绝对路径
         :param start: 开始上传的偏移量
+        :param workers: 并发上传分片的线程数，大于1时多个分片并发上传
+        :param max_in_flight: 并发上传时已读取未完成上传的分片数上限，默认workers的2倍
+        :param callback: 每个分片上传成功后的回调函数callback(offset, size)
+        :param use_mmap: True时内存映射(mmap)文件，分片数据不经拷贝直接发送；上传过程中文件不能被修改或截断
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(上传、下载分别共享ApiCore的AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param deadline: 整个上传的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时上传失败，返回的offset可以用于续传
         :return:
             (ok, offset, msg)
             ok: True or False, 指示上传是否成功
@@ -261,7 +791,13 @@ class ApiCore():
             msg: 上传结果描述字符串
         '''
         obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
-        return self.upload_obj_by_url(obj_url=obj_url, filename=filename, start=start)
+        result = self.upload_obj_by_url(obj_url=obj_url, filename=filename, start=start, workers=workers,
+                                        max_in_flight=max_in_flight, callback=callback, use_mmap=use_mmap,
+                                        chunk_size=chunk_size, deadline=deadline)
+        self._invalidate_metadata(bucket_name, path, obj_name)
+        if not result[0]:
+            self._invalidate_dir(bucket_name, path)
+        return result
 
     def read_one_chunk(self, bucket_name, path, obj_name, offset, size):
         '''
@@ -280,20 +816,23 @@ class ApiCore():
         obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
         return self.download_one_chunk(obj_url=obj_url, offset=offset, size=size)
 
-    def download_one_chunk(self, obj_url, offset, size):
+    def download_one_chunk(self, obj_url, offset, size, deadline=None, on_attempt=None):
         '''
         下载一个分片
 
         :param obj_url: 对象url
         :param offset: 分片偏移量
         :param size: 要下载的分片大小
+        :param deadline: 截止时间，Deadline()或者秒数
+        :param on_attempt: 每次请求尝试后调用，见request.request()
         :return:
             success: (True, {'chunk': chunk, 'obj_size': xx})
             failure: (False, msg)
             404: (None, msg)
         '''
         try:
-            r = request.get(obj_url, params={'offset': offset, 'size': size})
+            r = request.get(obj_url, params={'offset': offset, 'size': size}, session=self.session,
+                            retry=self.retry, deadline=deadline, on_attempt=on_attempt)
         except Exception as e:
             return (False, str(e))
 
@@ -313,48 +852,63 @@ class ApiCore():
 
         return (False, msg)
 
-    def _download_chunk(self, obj_url, offset, size):
+    def _download_chunk_observed(self, obj_url, offset, chunk_size, deadline=None):
         '''
-        下载一个分片，失败重试一次
+        下载一个分片，分片大小由chunk_size决定，自适应分片大小时记录分片每次请求尝试的传输耗时和结果
 
-        :param obj_url: 对象url
-        :param offset: 分片偏移量
-        :param size: 要下载的分片大小
+        :param chunk_size: 分片大小，int或者AdaptiveChunkSize()
+        :param deadline: 截止时间Deadline()
         :return:
-            success: (True, {'chunk': chunk, 'obj_size': xx})
-            failure: (False, msg)
-            404: (None, msg)
+            同download_one_chunk()
         '''
-        ok, result = self.download_one_chunk(obj_url=obj_url, offset=offset, size=size)
-        if ok is False:
-            ok, result = self.download_one_chunk(obj_url=obj_url, offset=offset, size=size)
-
-        return ok, result
+        return self.download_one_chunk(obj_url=obj_url, offset=offset, size=get_chunk_size(chunk_size),
+                                       deadline=deadline, on_attempt=chunk_observer(chunk_size))
 
-    def download_obj_by_url(self, obj_url, filename, start=0):
+    def download_obj_by_url(self, obj_url, filename, start=0, workers=1, resume=False, chunk_size=5*1024**2,
+                            deadline=None):
         '''
         下载一个对象
 
+        start大于0时为续传，保留文件中已下载的部分；文件已下载部分的长度小于start时，从文件末尾处继续下载
+
         :param obj_url: 对象url
         :param filename: 对象保存的绝对路径文件名
         :param start: 开始下载的偏移量
+        :param workers: 并发下载分片的线程数，大于1时多个分片并发下载
+        :param resume: True时从文件filename已下载部分的末尾处继续下载，忽略start
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(上传、下载分别共享ApiCore的AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param deadline: 整个下载的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时下载失败，返回的offset可以用于续传
         :return:
             (ok, offset, msg)
             ok: True or False, 指示下载是否成功
-            offset: 已下载对象的偏移量
+            offset: 已下载对象的偏移量，并发下载时为从start开始连续下载成功的偏移量
             msg: 操作结果描述字符串
         '''
-        offset = start
-        chunk_size = 5*1024*1024
+        chunk_size = make_chunk_size(chunk_size, auto=self.download_chunk_size)
+        deadline = Deadline.make(deadline)
 
         # 目录路径不存在存在则创建
         dir_path = os.path.dirname(filename)
-        if not os.path.exists(dir_path):
+        if dir_path and not os.path.exists(dir_path):
             os.makedirs(dir_path, exist_ok=True)
 
-        with open(filename, 'wb') as f:
+        # 已下载部分的长度
+        local_size = os.path.getsize(filename) if os.path.isfile(filename) else 0
+        if resume:
+            start = local_size
+        else:
+            start = min(start, local_size)
+
+        offset = start
+        if workers and workers > 1:
+            return self._download_obj_concurrently(obj_url=obj_url, filename=filename, start=start,
+                                                   workers=workers, chunk_size=chunk_size, deadline=deadline)
+
+        with open(filename, 'r+b' if start > 0 else 'wb') as f:
             while True:
-                ok, result = self._download_chunk(obj_url=obj_url, offset=offset, size=chunk_size)
+                ok, result = self._download_chunk_observed(obj_url=obj_url, offset=offset, chunk_size=chunk_size,
+                                                           deadline=deadline)
                 if ok is None: # 文件不存在
                     return (False, 0, result)
                 elif not ok:
@@ -368,9 +922,81 @@ class ApiCore():
 
                 offset += len(chunk)
                 if offset >= obj_size: # 下载完成
+                    f.truncate(offset)
                     return  (True, offset, 'download ok')
 
-    def download_obj(self, bucket_name, path, obj_name, filename, start=0):
+    def _download_obj_concurrently(self, obj_url, filename, start=0, workers=4, chunk_size=5*1024**2,
+                                   deadline=None):
+        '''
+        多线程并发下载一个对象，先下载第一个分片获取对象大小并预分配文件，
+        各线程下载互不重叠的分片并写入文件对应的位置；下载失败时文件截断到连续下载成功的偏移量处，
+        以便按文件长度续传
+
+        :param obj_url: 对象url
+        :param filename: 对象保存的绝对路径文件名
+        :param start: 开始下载的偏移量
+        :param workers: 并发下载分片的线程数
+        :param chunk_size: 分片大小，int或者AdaptiveChunkSize()
+        :param deadline: 截止时间Deadline()
+        :return:
+            (ok, offset, msg)
+            ok: True or False, 指示下载是否成功
+            offset: 从start开始连续下载成功的偏移量
+            msg: 操作结果描述字符串
+        '''
+        ok, result = self._download_chunk_observed(obj_url=obj_url, offset=start, chunk_size=chunk_size,
+                                                   deadline=deadline)
+        if ok is None: # 文件不存在
+            return (False, 0, result)
+        elif not ok:
+            return (False, start, 'downloading interrupt')
+
+        chunk = result.get('chunk', None)
+        obj_size = result.get('obj_size', 0)
+
+        fd = os.open(filename, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o666)
+        try:
+            os.ftruncate(fd, obj_size)  # 预分配文件
+            write_at(fd, chunk, start)
+            committed = start + len(chunk)  # 从start开始连续下载成功的偏移量
+            acked = {}                      # 已下载但与committed不连续的分片, {offset: end}
+
+            def download(item):
+                offset, size = item
+                ok, result = self.download_one_chunk(obj_url=obj_url, offset=offset, size=size, deadline=deadline,
+                                                     on_attempt=chunk_observer(chunk_size))
+                if ok:
+                    write_at(fd, result.get('chunk'), offset)
+                return ok, result
+
+            def ranges(offset):
+                # 分片大小在生成下一个分片时确定，自适应分片大小时随传输情况变化
+                while offset < obj_size:
+                    size = min(get_chunk_size(chunk_size), obj_size - offset)
+                    yield offset, size
+                    offset += size
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = iter_completed(executor, download, ranges(committed), max_in_flight=workers * 2)
+                for (offset, size), (ok, result) in results:
+                    if not ok:
+                        results.close()
+                        break
+
+                    acked[offset] = offset + len(result.get('chunk'))
+                    while committed in acked:
+                        committed = acked.pop(committed)
+
+            if committed < obj_size:
+                os.ftruncate(fd, committed)
+                return (False, committed, 'downloading interrupt')
+        finally:
+            os.close(fd)
+
+        return (True, committed, 'download ok')
+
+    def download_obj(self, bucket_name, path, obj_name, filename, start=0, workers=1, resume=False,
+                     chunk_size=5*1024**2, deadline=None):
         '''
         下载一个对象
 
@@ -379,6 +1005,11 @@ class ApiCore():
         :param obj_name: 对象名称
         :param filename: 对象保存的绝对路径文件名
         :param start: 开始下载的偏移量
+        :param workers: 并发下载分片的线程数，大于1时多个分片并发下载
+        :param resume: True时从文件filename已下载部分的末尾处继续下载，忽略start
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(上传、下载分别共享ApiCore的AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param deadline: 整个下载的截止时间，Deadline()或者秒数，所有分片请求和重试共享剩余时间；
+                        超过截止时间时下载失败，返回的offset可以用于续传
         :return:
             (ok, offset, msg)
             ok: True or False, 指示下载是否成功
@@ -386,7 +1017,89 @@ class ApiCore():
             msg: 操作结果描述字符串
         '''
         obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
-        return self.download_obj_by_url(obj_url=obj_url, filename=filename, start=start)
+        return self.download_obj_by_url(obj_url=obj_url, filename=filename, start=start, workers=workers,
+                                        resume=resume, chunk_size=chunk_size, deadline=deadline)
+
+    def iter_obj_by_url(self, obj_url, offset=0, chunk_size=5*1024**2, prefetch=2):
+        '''
+        流式读取一个对象的数据，不写入本地文件；在调用者处理当前分片时，后台线程预先下载之后的分片，
+        内存中最多保存prefetch + 1个分片
+
+        :param obj_url: 对象url
+        :param offset: 开始读取的偏移量
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(上传、下载分别共享ApiCore的AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param prefetch: 后台预先下载的分片数，0为不预先下载
+        :return:
+            生成器，依次返回对象的数据分片bytes
+        :raises FileNotFoundError: 对象不存在
+        :raises IOError: 下载分片失败
+        '''
+        def get_chunk(ok, result, size):
+            if ok is None:
+                raise FileNotFoundError(result)
+            elif not ok:
+                raise IOError(result)
+
+            chunk = result.get('chunk')
+            if size is not None and len(chunk) != size:
+                raise IOError('读取的数据大小与请求的分片大小不一致，对象可能已被修改')
+            return chunk
+
+        chunk_size = make_chunk_size(chunk_size, auto=self.download_chunk_size)
+
+        # 第一个分片获取对象大小
+        ok, result = self._download_chunk_observed(obj_url=obj_url, offset=offset, chunk_size=chunk_size)
+        chunk = get_chunk(ok, result, size=None)
+        obj_size = result.get('obj_size', 0)
+        if chunk:
+            yield chunk
+
+        next_offset = offset + len(chunk)
+        if next_offset >= obj_size:
+            return
+
+        futures = deque()
+        with ThreadPoolExecutor(max_workers=max(prefetch, 1)) as executor:
+            def submit(n):
+                nonlocal next_offset
+                while len(futures) < n and next_offset < obj_size:
+                    size = min(get_chunk_size(chunk_size), obj_size - next_offset)
+                    futures.append((size, executor.submit(self.download_one_chunk, obj_url=obj_url, offset=next_offset,
+                                                          size=size, on_attempt=chunk_observer(chunk_size))))
+                    next_offset += size
+
+            try:
+                while True:
+                    submit(max(prefetch, 1))
+                    if not futures:
+                        break
+
+                    size, future = futures.popleft()
+                    ok, result = future.result()
+                    chunk = get_chunk(ok, result, size=size)
+                    submit(prefetch)  # 调用者处理此分片时，后台下载之后的分片
+                    yield chunk
+            finally:
+                for _, future in futures:
+                    future.cancel()
+
+    def iter_obj(self, bucket_name, path, obj_name, offset=0, chunk_size=5*1024**2, prefetch=2):
+        '''
+        流式读取一个对象的数据，不写入本地文件
+
+        :param bucket_name: 存储桶名称
+        :param path: 目录路径
+        :param obj_name: 对象名称
+        :param offset: 开始读取的偏移量
+        :param chunk_size: 分片大小，int、AdaptiveChunkSize()或者'auto'(上传、下载分别共享ApiCore的AdaptiveChunkSize，按每次分片请求的耗时和失败自适应调整)
+        :param prefetch: 后台预先下载的分片数，0为不预先下载
+        :return:
+            生成器，依次返回对象的数据分片bytes
+        :raises FileNotFoundError: 对象不存在
+        :raises IOError: 下载分片失败
+        '''
+        obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
+        return self.iter_obj_by_url(obj_url=obj_url, offset=offset, chunk_size=chunk_size, prefetch=prefetch)
 
     def delete_obj_by_url(self, obj_url):
         '''
@@ -400,7 +1113,7 @@ class ApiCore():
             msg: 请求结果描述字符串
         '''
         try:
-            r = request.delete(url=obj_url)
+            r = request.delete(url=obj_url, session=self.session, retry=self.retry)
         except Exception as e:
             return (False, None, str(e))
 
@@ -424,7 +1137,41 @@ class ApiCore():
             msg: 请求结果描述字符串
         '''
         obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=dir_path, obj_name=obj_name)
-        return self.delete_obj_by_url(obj_url=obj_url)
+        result = self.delete_obj_by_url(obj_url=obj_url)
+        self._invalidate_metadata(bucket_name, dir_path, obj_name)
+        return result
+
+    def delete_objs(self, bucket_name, obj_paths, workers=8, max_in_flight=None):
+        '''
+        多线程并发删除多个对象，按删除完成的顺序返回每个对象的结果；
+        所有请求复用会话的连接池，workers超过连接池大小(POOL_MAXSIZE)时多出的连接用后即关闭
+
+        obj_paths按需读取，同时进行中的删除请求数不超过max_in_flight，可以是包含大量对象路径的生成器；
+        生成器被关闭时未开始的删除请求不再发送
+
+        :param bucket_name: 存储桶名称
+        :param obj_paths: 对象全路径名称的可迭代对象
+        :param workers: 并发删除的线程数
+        :param max_in_flight: 已提交未完成的删除请求数上限，默认workers的2倍
+        :return:
+            生成器，(obj_path, ok, code, msg)
+            ok: True or False, 指示删除是否成功
+            code: 请求返回的状态码
+            msg: 请求结果描述字符串
+        '''
+        workers = max(workers or 1, 1)
+        max_in_flight = max(max_in_flight or workers * 2, workers)
+
+        def delete(obj_path):
+            return self.delete_obj(bucket_name=bucket_name, dir_path='', obj_name=obj_path)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = iter_completed(executor, delete, obj_paths, max_in_flight=max_in_flight)
+            try:
+                for obj_path, (ok, code, msg) in results:
+                    yield obj_path, ok, code, msg
+            finally:
+                results.close()
 
     def get_metadata(self, bucket_name, path):
         '''
@@ -436,9 +1183,15 @@ class ApiCore():
             code: 请求返回的状态码或None
             msg: 结果描述字符串
         '''
+        cache = self.metadata_cache
+        if cache is not None:
+            result = cache.get_metadata(bucket_name, path)
+            if result is not None:
+                return result
+
         url = self._url_builder.build_metadata_url(bucket_name=bucket_name, path=path)
         try:
-            r = request.get(url=url)
+            r = request.get(url=url, session=self.session, retry=self.retry)
         except Exception as e:
             return (None, None, str(e))
 
@@ -448,10 +1201,14 @@ class ApiCore():
             except ValueError as e:
                 return (None, None, '获取无效的json数据：' + str(e))
 
-            return (data, 200, "Get metedata successful.")
+            result = (data, 200, "Get metedata successful.")
+        else:
+            result = (False, r.status_code, get_response_msg(r))
 
-        msg = get_response_msg(r)
-        return (False, r.status_code, msg)
+        # 缓存成功和不存在(404)的结果
+        if cache is not None and r.status_code in (200, 404):
+            cache.set_metadata(bucket_name, path, result)
+        return result
 
     def share_obj_by_url(self, obj_url, share=True, days=0):
         '''
@@ -467,7 +1224,8 @@ class ApiCore():
             msg: 请求结果描述字符串
         '''
         try:
-            r = request.patch(url=obj_url, params={'share': share, 'days': days})
+            r = request.patch(url=obj_url, params={'share': share, 'days': days}, session=self.session,
+                              retry=self.retry)
         except Exception as e:
             return (False, None, str(e))
 
@@ -493,7 +1251,9 @@ class ApiCore():
             msg: 请求结果描述字符串
         '''
         obj_url = self._url_builder.build_obj_url(bucket_name=bucket_name, path=dir_path, obj_name=obj_name)
-        return self.share_obj_by_url(obj_url=obj_url, share=share, days=days)
+        result = self.share_obj_by_url(obj_url=obj_url, share=share, days=days)
+        self._invalidate_metadata(bucket_name, dir_path, obj_name)
+        return result
 
     def create_dir_by_url(self, dir_url):
         '''
@@ -506,15 +1266,19 @@ class ApiCore():
             msg: 请求结果描述字符串
         '''
         try:
-            r = request.post(dir_url)
-        except request.ConnectionError as e:
+            # 目录已存在时返回400和existing，按成功处理，重复发送的结果相同，可以重试
+            r = request.post(dir_url, session=self.session, retry=self.retry, idempotent=True)
+        except request.RequestException as e:
             return (False, 0, str(e))
 
         msg = get_response_msg(r)
         if r.status_code == 201:
             return (True, 201, msg)
         elif r.status_code == 400:
-            data = r.json()
+            try:
+                data = r.json()
+            except ValueError:
+                data = {}
             if data.get('existing', '') is True:
                 return (True, 400, msg)
 
@@ -536,7 +1300,11 @@ class ApiCore():
             return (False, None, '目录名不能包含“/”')
 
         dir_url = self._url_builder.build_dir_url(bucket_name=bucket_name, path=base_dir, dir_name=dir_name)
-        return self.create_dir_by_url(dir_url)
+        result = self.create_dir_by_url(dir_url)
+        self._invalidate_metadata(bucket_name, base_dir, dir_name)
+        if result[0]:
+            self.dir_cache.add(bucket_name, join_url_with_slash(base_dir, dir_name))
+        return result
 
     def create_path(self, bucket_name=None, base_dir='', dir_path=''):
         '''
@@ -554,16 +1322,19 @@ class ApiCore():
         bucket_name = bucket_name
         dirs = get_path_breadcrumb(dir_path, base_dir=base_dir)
 
-        # 尝试从头创建整个路径
-        for dir_name, p_dir_path in dirs:
-            ok, *_ = self.create_dir(bucket_name=bucket_name, base_dir=p_dir_path, dir_name=dir_name)
-            if not ok:
-                # 再次尝试
-                ok, *_ = self.create_dir(bucket_name=bucket_name, base_dir=p_dir_path, dir_name=dir_name)
+        # 只创建已知存在的最深目录之后的部分
+        todo = self.dir_cache.missing(bucket_name, dirs)
+        while todo is not None:
+            for dir_name, p_dir_path in todo:
+                ok, code, _ = self.create_dir(bucket_name=bucket_name, base_dir=p_dir_path, dir_name=dir_name)
                 if not ok:
-                    return False
+                    break
+            else:
+                return True
+
+            todo = self.dir_cache.replan(bucket_name, dirs, todo, failed=(dir_name, p_dir_path), code=code)
 
-        return True
+        return False
 
     def get_objs_and_subdirs_by_url(self, dir_url, limit=None, offset=None):
         '''
@@ -586,7 +1357,7 @@ class ApiCore():
             params['offset'] = offset
 
         try:
-            r = request.get(dir_url, params=params)
+            r = request.get(dir_url, params=params, session=self.session, retry=self.retry)
         except Exception as e:
             return (None, None, str(e))
 
@@ -596,6 +1367,12 @@ class ApiCore():
             except ValueError as e:
                 return (None, None, '获取无效的json数据：' + str(e))
 
+            if data.get('bucket_name') is not None:
+                self.dir_cache.fill_from_listing(bucket_name=data.get('bucket_name'), dir_path=data.get('dir_path'),
+                                                 files=data.get('files', []))
+                if self.metadata_cache is not None:
+                    self.metadata_cache.fill_from_listing(bucket_name=data.get('bucket_name'),
+                                                          dir_path=data.get('dir_path'), files=data.get('files', []))
             return (data, 200, "Get data successful.")
 
         msg = get_response_msg(r)
@@ -616,7 +1393,307 @@ class ApiCore():
             msg: 结果描述字符串
         '''
         dir_url = self._url_builder.build_dir_url(bucket_name=bucket_name, path=dir_name)
-        return self.get_objs_and_subdirs_by_url(dir_url=dir_url, limit=limit, offset=offset)
+        data, code, msg = self.get_objs_and_subdirs_by_url(dir_url=dir_url, limit=limit, offset=offset)
+        if code == 404:
+            self._invalidate_dir(bucket_name, dir_name)
+        return data, code, msg
+
+    def get_all_objs_and_subdirs(self, bucket_name, dir_name, per_page=1000, workers=1):
+        '''
+        获取目录下所有的对象和子目录
+
+        :param bucket_name: 存储桶名称
+        :param dir_name: 目录绝对路径
+        :param per_page: 每页获取的数量
+        :param workers: 并发获取分页的线程数，大于1时获取第一页后按count并发获取其余的分页
+        :return:
+            (files, code, msg)
+            files: 请求成功时对象和子目录信息的列表，失败时为None
+            code: 请求返回的状态码或None
+            msg: 结果描述字符串
+        '''
+        files = []
+        try:
+            for page in self.iter_dir_pages(bucket_name=bucket_name, dir_name=dir_name, per_page=per_page,
+                                            workers=workers):
+                files.extend(page)
+        except FileNotFoundError as e:
+            return (None, 404, str(e))
+        except IOError as e:
+            return (None, None, str(e))
+
+        return (files, 200, 'Get data successful.')
+
+    def iter_dir_pages(self, bucket_name, dir_name, per_page=1000, workers=1):
+        '''
+        依次获取目录下所有的分页
+
+        workers为1时按分页的next链接依次获取；大于1时获取第一页后，按第一页返回的对象和子目录总数count
+        同时请求其余每一页的offset，按顺序返回，总耗时约为一次请求的延迟而不是count/per_page次；
+        获取过程中目录内容变化时，并发获取的分页可能重复或遗漏个别项
+
+        :param bucket_name: 存储桶名称
+        :param dir_name: 目录绝对路径
+        :param per_page: 每页获取的数量
+        :param workers: 并发获取分页的线程数
+        :return:
+            生成器，依次返回每一页的对象和子目录信息列表
+        :raises FileNotFoundError: 目录不存在
+        :raises IOError: 获取分页失败
+        '''
+        def check(data, code, msg):
+            if not data:
+                if code == 404:
+                    raise FileNotFoundError(msg)
+                raise IOError(msg)
+            return data
+
+        data = check(*self.get_objs_and_subdirs(bucket_name=bucket_name, dir_name=dir_name, limit=per_page))
+        files = data.get('files', [])
+        yield files
+
+        # 服务器可能限制每页的数量，以第一页实际返回的数量为每页的大小
+        step = len(files)
+        count = data.get('count') or 0
+        if workers and workers > 1 and data.get('next') and step > 0 and count > step:
+            dir_url = self._url_builder.build_dir_url(bucket_name=bucket_name, path=dir_name)
+            offsets = iter(range(step, count, step))
+            futures = deque()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                def submit():
+                    for offset in offsets:
+                        futures.append(executor.submit(self.get_objs_and_subdirs_by_url, dir_url, step, offset))
+                        if len(futures) >= workers * 2:
+                            break
+
+                try:
+                    submit()
+                    while futures:
+                        data = check(*futures.popleft().result())
+                        submit()
+                        yield data.get('files', [])
+                finally:
+                    for future in futures:
+                        future.cancel()
+
+        # 获取过程中目录新增的项
+        next_url = data.get('next')
+        while next_url:
+            data = check(*self.get_objs_and_subdirs_by_url(dir_url=next_url))
+            yield data.get('files', [])
+            next_url = data.get('next')
+
+    def iter_objs_and_subdirs(self, bucket_name, dir_name, per_page=1000, prefetch=2, workers=1):
+        '''
+        依次返回目录下所有的对象和子目录信息，跨越所有分页；在调用者处理当前页时，
+        后台线程预先获取之后的分页，内存中最多保存prefetch + 1页
+
+        :param bucket_name: 存储桶名称
+        :param dir_name: 目录绝对路径
+        :param per_page: 每页获取的数量
+        :param prefetch: 后台预先获取的页数，0为不预先获取
+        :param workers: 并发获取分页的线程数，大于1时获取第一页后按count并发获取其余的分页
+        :return:
+            生成器，依次返回对象或子目录的信息字典
+        :raises FileNotFoundError: 目录不存在
+        :raises IOError: 获取分页失败
+        '''
+        pages = self.iter_dir_pages(bucket_name=bucket_name, dir_name=dir_name, per_page=per_page, workers=workers)
+        for files in iter_prefetched(pages, prefetch=prefetch):
+            yield from files
+
+    def walk(self, bucket_name, top='', workers=8, per_page=1000, onerror=None):
+        '''
+        类似os.walk()遍历目录树，多线程并发列举目录，每个目录获取所有分页；
+        按目录列举完成的顺序返回，不保证父子目录以外的顺序
+
+        与os.walk(topdown=True)一样，调用者可以原地修改返回的subdirs列表，只遍历其中保留的子目录
+
+        :param bucket_name: 存储桶名称
+        :param top: 开始遍历的目录路径
+        :param workers: 并发列举目录的线程数，同时进行的列举请求数上限
+        :param per_page: 列举目录时每页获取的数量
+        :param onerror: 目录列举失败时的回调函数onerror(dir_path, msg)，默认忽略失败的目录
+        :return:
+            生成器，(dir_path, subdirs, objects)
+            dir_path: 目录路径
+            subdirs: 子目录名称列表
+            objects: 对象名称列表
+        '''
+        for path, files, subdirs in self._walk_dirs(bucket_name=bucket_name, top=top, workers=workers,
+                                                    per_page=per_page, onerror=onerror):
+            yield path, subdirs, [f.get('name') for f in files if f.get('fod')]
+
+    def _walk_dirs(self, bucket_name, top='', workers=8, per_page=1000, onerror=None):
+        '''
+        并发遍历目录树，参数同walk()
+
+        :return:
+            生成器，(dir_path, files, subdirs)
+            files: 目录下所有的对象和子目录信息列表
+            subdirs: 子目录名称列表，调用者原地修改后，只遍历其中保留的子目录
+        '''
+        workers = max(workers or 1, 1)
+        ready = deque([top.strip('/')])
+        pending = {}
+
+        def list_dir(path):
+            return self.get_all_objs_and_subdirs(bucket_name=bucket_name, dir_name=path, per_page=per_page)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                while ready or pending:
+                    while ready and len(pending) < workers:
+                        path = ready.popleft()
+                        pending[executor.submit(list_dir, path)] = path
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path = pending.pop(future)
+                        files, code, msg = future.result()
+                        if files is None:
+                            if onerror is not None:
+                                onerror(path, msg)
+                            continue
+
+                        subdirs = [f.get('name') for f in files if not f.get('fod')]
+                        yield path, files, subdirs
+                        ready.extend('/'.join([path, name]).lstrip('/') for name in subdirs)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def list_compact(self, bucket_name, dir_name, recursive=False, per_page=1000, workers=8):
+        '''
+        获取目录下所有的对象和子目录，保存在紧凑的列存储CompactListing中；
+        逐页添加到CompactListing，不在内存中同时保存所有项的json字典
+
+        :param bucket_name: 存储桶名称
+        :param dir_name: 目录绝对路径
+        :param recursive: True时并发遍历目录树，包括所有子目录下的对象和子目录
+        :param per_page: 每页获取的数量
+        :param workers: 并发获取分页(recursive时为并发列举目录)的线程数
+        :return:
+            CompactListing()
+        :raises FileNotFoundError: 目录不存在
+        :raises IOError: 获取分页失败
+        '''
+        listing = CompactListing()
+        if not recursive:
+            for files in self.iter_dir_pages(bucket_name=bucket_name, dir_name=dir_name, per_page=per_page,
+                                             workers=workers):
+                listing.extend(files, dir_path=dir_name)
+            return listing
+
+        def onerror(path, msg):
+            raise IOError(msg)
+
+        for path, files, subdirs in self._walk_dirs(bucket_name=bucket_name, top=dir_name, workers=workers,
+                                                    per_page=per_page, onerror=onerror):
+            listing.extend(files, dir_path=path)
+        return listing
+
+    def rmtree(self, bucket_name, dir_path, workers=8, dry_run=False, callback=None, per_page=1000):
+        '''
+        递归删除一个目录及其下所有的子目录和对象
+
+        多线程并发列举子目录和删除对象，一个目录下的对象和子目录都删除后立即删除此目录(自底向上)，
+        不等待整个目录树遍历完成；删除失败的对象或目录不影响其他分支，其所有上级目录保留不删除；
+        已不存在的对象和目录(404)视为删除成功，包括要删除的目录dir_path本身，中断后可以重新执行
+
+        :param bucket_name: 存储桶名称
+        :param dir_path: 要删除的目录路径，''时删除存储桶下所有的对象和目录，存储桶根目录保留
+        :param workers: 并发列举和删除的线程数
+        :param dry_run: True时只遍历目录树，不删除，回调和返回的统计为将要删除的对象和目录
+        :param callback: 每个对象或目录删除后的回调函数callback(kind, path, ok, msg)，kind为'obj'或'dir'
+        :param per_page: 列举目录时每页获取的数量
+        :return:
+            (ok, stats)
+            ok: True or False, 指示是否全部删除成功
+            stats: {'objs': 删除的对象数, 'dirs': 删除的目录数, 'errors': [(path, msg), ...]}
+        '''
+        dir_path = dir_path.strip('/')
+        stats = {'objs': 0, 'dirs': 0, 'errors': []}
+        remaining = {}  # 目录未完成的子任务数，{dir_path: n}，包括目录的列举
+        failed = set()  # 有子项删除失败的目录
+        ready = deque([('list', dir_path)])
+
+        def run(task):
+            kind, path = task
+            if kind == 'list':
+                return self.get_all_objs_and_subdirs(bucket_name=bucket_name, dir_name=path, per_page=per_page)
+            if dry_run:
+                return (True, None, 'dry run')
+            if kind == 'obj':
+                return self.delete_obj(bucket_name=bucket_name, dir_path='', obj_name=path)
+            return self.delete_dir(bucket_name=bucket_name, base_dir=path)
+
+        def finish(path, ok):
+            # 目录path的一个子任务完成，所有子任务都完成时删除目录
+            if not ok:
+                failed.add(path)
+
+            remaining[path] -= 1
+            if remaining[path] > 0:
+                return
+
+            del remaining[path]
+            if path == '':     # 存储桶根目录不删除
+                return
+            if path in failed:
+                failed.discard(path)
+                if path != dir_path:
+                    finish(path.rpartition('/')[0], False)
+            else:
+                ready.append(('dir', path))
+
+        remaining[dir_path] = 1
+        max_in_flight = max(workers or 1, 1) * 2
+        pending = {}
+        with ThreadPoolExecutor(max_workers=max(workers or 1, 1)) as executor:
+            while ready or pending:
+                while ready and len(pending) < max_in_flight:
+                    task = ready.popleft()
+                    pending[executor.submit(run, task)] = task
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, path = pending.pop(future)
+                    result, code, msg = future.result()
+                    if kind == 'list':
+                        if result is None and code == 404:  # 目录已不存在，没有需要删除的内容
+                            del remaining[path]
+                            if path != dir_path:
+                                finish(path.rpartition('/')[0], True)
+                            continue
+                        if result is None:
+                            stats['errors'].append((path, msg))
+                            finish(path, False)
+                            continue
+
+                        for f in result:
+                            child = '/'.join([path, f.get('name')]).lstrip('/')
+                            remaining[path] += 1
+                            if f.get('fod'):
+                                ready.append(('obj', child))
+                            else:
+                                remaining[child] = 1
+                                ready.append(('list', child))
+                        finish(path, True)
+                        continue
+
+                    ok = bool(result) or code == 404
+                    if ok:
+                        stats[kind + 's'] += 1
+                    else:
+                        stats['errors'].append((path, msg))
+                    if callback is not None:
+                        callback(kind, path, ok, msg)
+
+                    if path != dir_path:
+                        finish(path.rpartition('/')[0], ok)
+
+        return (not stats['errors'], stats)
 
     def delete_dir_by_url(self, dir_url):
         '''
@@ -629,8 +1706,8 @@ class ApiCore():
             msg: 请求结果描述字符串
         '''
         try:
-            r = request.delete(dir_url)
-        except request.ConnectionError as e:
+            r = request.delete(dir_url, session=self.session, retry=self.retry)
+        except request.RequestException as e:
             return (False, 0, str(e))
 
         msg = get_response_msg(r)
@@ -655,7 +1732,10 @@ class ApiCore():
             return (False, None, '目录名不能包含“/”')
 
         dir_url = self._url_builder.build_dir_url(bucket_name=bucket_name, path=base_dir, dir_name=dir_name)
-        return self.delete_dir_by_url(dir_url)
+        result = self.delete_dir_by_url(dir_url)
+        self._invalidate_metadata(bucket_name, base_dir, dir_name, recursive=True)
+        self.dir_cache.invalidate(bucket_name, join_url_with_slash(base_dir, dir_name), recursive=True)
+        return result
 
     def create_bucket(self, bucket_name):
         '''
@@ -669,7 +1749,7 @@ class ApiCore():
         '''
         url = self._url_builder.build_bucket_url()
         try:
-            r = request.post(url=url, data={'name': bucket_name})
+            r = request.post(url=url, data={'name': bucket_name}, session=self.session, retry=self.retry)
         except request.RequestException as e:
             return (False, None, str(e))
 
@@ -690,7 +1770,7 @@ class ApiCore():
         '''
         url = self._url_builder.build_bucket_url()
         try:
-            r = request.get(url=url)
+            r = request.get(url=url, session=self.session, retry=self.retry)
         except request.RequestException as e:
             return (None, None, str(e))
 
@@ -701,10 +1781,45 @@ class ApiCore():
             except ValueError as e:
                 return (None, None, '获取无效的json数据：' + str(e))
 
+            self.bucket_ids.fill(data)
             return (data, 200, msg)
 
         return (None, r.status_code, msg)
 
+    def get_bucket_id(self, bucket_name, refresh=False):
+        '''
+        通过名称获取存储桶id
+
+        优先使用缓存的名称到id映射，缓存中没有时获取一次存储桶列表，刷新所有存储桶的映射；
+        多个线程同时未命中时只获取一次
+
+        :param bucket_name: 存储桶名称
+        :param refresh: True时忽略缓存，重新获取存储桶列表
+        :return: (id, code, msg)
+            success: (id, 200, msg)
+            存储桶不存在: (False, 404, msg)
+            error: (None, code or None, msg)
+        '''
+        if not refresh:
+            bid = self.bucket_ids.get(bucket_name)
+            if bid is not None:
+                return (bid, 200, 'ok')
+
+        with self._bucket_ids_lock:
+            # 等待期间其他线程可能已经刷新了缓存
+            bid = None if refresh else self.bucket_ids.get(bucket_name)
+            if bid is None:
+                data, code, msg = self.get_buckets()
+                if not data:
+                    return (None, code, msg)
+
+                bid = self.bucket_ids.get(bucket_name)
+
+        if bid is None:
+            return (False, 404, 'bucket not found')
+
+        return (bid, 200, 'ok')
+
     def bucket_permission(self, bucket_id, public=False):
         '''
         设置存储桶公有私有权限
@@ -718,7 +1833,7 @@ class ApiCore():
         '''
         url = self._url_builder.build_bucket_url(bucket_id=bucket_id)
         try:
-            r = request.patch(url=url, params={'public': public})
+            r = request.patch(url=url, params={'public': public}, session=self.session, retry=self.retry)
         except request.RequestException as e:
             return (False, None, str(e))
 
@@ -754,10 +1869,13 @@ class ApiCore():
 
         url = self._url_builder.build_move_url(bucket_name=bucket_name, path=path, obj_name=obj_name)
         try:
-            r = request.post(url=url, params=params)
+            r = request.post(url=url, params=params, session=self.session, retry=self.retry)
         except request.RequestException as e:
             return False, {'code': None, 'msg': str(e)}
 
+        self._invalidate_metadata(bucket_name, path, obj_name)
+        self._invalidate_metadata(bucket_name, move_to or path, rename or obj_name)
+
         msg = get_response_msg(r)
         if r.status_code == 201:
             try:
@@ -0,0 +1,73 @@
+import time
+
+from requests.exceptions import Timeout
+
+
+class DeadlineExceeded(Timeout):
+    '''
+    操作已超过截止时间
+    '''
+
+
+class Deadline():
+    '''
+    一个操作的截止时间，操作的所有请求(包括每个分片和重试)共享剩余的时间，
+    每个请求的连接和读取超时不超过剩余时间，超过截止时间的请求不再发送
+    '''
+    def __init__(self, seconds):
+        '''
+        :param seconds: 从现在开始操作可用的时间(秒)
+        '''
+        self.seconds = seconds
+        self._expires = time.monotonic() + seconds
+
+    def __str__(self):
+        return 'Deadline(remaining={0:.3f}s)'.format(self.remaining())
+
+    @classmethod
+    def make(cls, deadline):
+        '''
+        :param deadline: None(无截止时间)，Deadline()，或者秒数
+        :return:
+            None或者Deadline()
+        '''
+        if deadline is None or isinstance(deadline, Deadline):
+            return deadline
+
+        return cls(deadline)
+
+    def remaining(self):
+        '''剩余的时间(秒)'''
+        return max(0.0, self._expires - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self):
+        '''
+        :raises DeadlineExceeded: 已超过截止时间
+        '''
+        if self.expired:
+            raise self._exceeded()
+
+    def _exceeded(self):
+        return DeadlineExceeded('deadline of {0}s exceeded'.format(self.seconds))
+
+    def timeout(self, timeout=None):
+        '''
+        请求的超时时间，不超过剩余时间
+
+        :param timeout: 请求的超时时间，None、秒数或者(连接超时, 读取超时)
+        :return:
+            (连接超时, 读取超时)
+        :raises DeadlineExceeded: 已超过截止时间
+        '''
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise self._exceeded()
+
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+
+        return tuple(remaining if t is None else min(t, remaining) for t in timeout)
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import threading
+
+
+class UploadJournal():
+    '''
+    上传日志，记录服务器已确认上传成功的分片，进程崩溃或重启后可以从已上传的偏移量处续传
+
+    日志保存在一个sqlite数据库文件中，以(存储桶, 对象路径, 本地文件路径, 文件大小, 文件修改时间)标识一个上传，
+    本地文件被修改后之前的上传记录不再有效
+    '''
+    def __init__(self, db_path):
+        '''
+        :param db_path: 日志sqlite数据库文件路径
+        '''
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS upload_chunk ('
+                'bucket_name TEXT NOT NULL, obj_path TEXT NOT NULL, filename TEXT NOT NULL, '
+                'size INTEGER NOT NULL, mtime INTEGER NOT NULL, '
+                'chunk_offset INTEGER NOT NULL, chunk_end INTEGER NOT NULL, '
+                'PRIMARY KEY (bucket_name, obj_path, filename, size, mtime, chunk_offset))')
+
+    def __str__(self):
+        return 'UploadJournal({0})'.format(self.db_path)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def make_key(bucket_name, obj_path, filename):
+        '''
+        一个上传的标识
+
+        :param bucket_name: 存储桶名称
+        :param obj_path: 对象全路径
+        :param filename: 上传的本地文件路径
+        :return:
+            (bucket_name, obj_path, filename, size, mtime)
+        '''
+        filename = os.path.abspath(filename)
+        st = os.stat(filename)
+        return (bucket_name, obj_path.strip('/'), filename, st.st_size, st.st_mtime_ns)
+
+    def record(self, key, offset, size):
+        '''
+        记录一个服务器已确认上传成功的分片
+
+        :param key: make_key()返回的上传标识
+        :param offset: 分片偏移量
+        :param size: 分片大小
+        '''
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO upload_chunk VALUES (?, ?, ?, ?, ?, ?, ?)',
+                               key + (offset, offset + size))
+
+    def get_offset(self, key):
+        '''
+        从0开始连续上传成功的偏移量
+
+        :param key: make_key()返回的上传标识
+        :return:
+            offset
+        '''
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT chunk_offset, chunk_end FROM upload_chunk WHERE bucket_name=? AND obj_path=? '
+                'AND filename=? AND size=? AND mtime=? ORDER BY chunk_offset', key).fetchall()
+
+        offset = 0
+        for chunk_offset, chunk_end in rows:
+            if chunk_offset > offset:
+                break
+            offset = max(offset, chunk_end)
+
+        return offset
+
+    def remove(self, key):
+        '''
+        删除一个上传的记录，包括本地文件被修改前的旧记录
+
+        :param key: make_key()返回的上传标识
+        '''
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM upload_chunk WHERE bucket_name=? AND obj_path=? AND filename=?', key[:3])
@@ -0,0 +1,206 @@
+from array import array
+from datetime import datetime
+
+
+def parse_time(value):
+    '''
+    ISO 8601格式的时间字符串转为时间戳
+
+    :param value: 时间字符串，如'2020-01-01T00:00:00+08:00'
+    :return:
+        时间戳(秒)，无效或None时返回nan
+    '''
+    if not value:
+        return float('nan')
+
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+class ListingEntry():
+    '''
+    CompactListing中的一项
+    '''
+    __slots__ = ('path', 'name', 'size', 'fod', 'ult', 'upt', 'public')
+
+    def __init__(self, path, name, size, fod, ult, upt, public):
+        self.path = path        # 所在目录路径
+        self.name = name        # 名称
+        self.size = size        # 对象大小
+        self.fod = fod          # True为对象，False为目录
+        self.ult = ult          # 上传时间戳，未知时为nan
+        self.upt = upt          # 修改时间戳，未知时为nan
+        self.public = public    # 是否公有访问权限
+
+    def __repr__(self):
+        return 'ListingEntry(na={0!r}, size={1}, fod={2})'.format(self.na, self.size, self.fod)
+
+    @property
+    def na(self):
+        '''全路径'''
+        return '/'.join([self.path, self.name]).lstrip('/')
+
+
+class CompactListing():
+    '''
+    紧凑的列存储目录列表，用于在内存中保存大量的子目录和对象信息
+
+    每一列保存在类型化的数组中：名称以utf-8编码连续保存在一个bytearray中，所在目录路径只保存一份，
+    每项只记录其编号；大小、时间戳、对象或目录、访问权限分别保存在array或bytearray中，
+    每项约占用名称长度加40字节，而不是每项一个json字典；数组支持缓冲区协议，可以不经拷贝转为numpy数组
+    '''
+    def __init__(self):
+        self._names = bytearray()
+        self._name_offsets = array('Q', [0])
+        self._prefixes = []             # 目录路径列表
+        self._prefix_ids = {}           # {目录路径: 编号}
+        self.path_ids = array('I')      # 每项所在目录路径的编号
+        self.sizes = array('q')
+        self.fods = bytearray()         # 1为对象，0为目录
+        self.ults = array('d')
+        self.upts = array('d')
+        self.publics = bytearray()      # 1为公有访问权限
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __str__(self):
+        return 'CompactListing(entries={0}, dirs={1})'.format(len(self), len(self._prefixes))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('CompactListing index out of range')
+
+        return ListingEntry(path=self._prefixes[self.path_ids[i]], name=self.name(i), size=self.sizes[i],
+                            fod=bool(self.fods[i]), ult=self.ults[i], upt=self.upts[i], public=bool(self.publics[i]))
+
+    @property
+    def nbytes(self):
+        '''各列数组占用的内存字节数(不含目录路径)'''
+        return sum(len(c) * c.itemsize for c in (self._name_offsets, self.path_ids, self.sizes, self.ults,
+                                                 self.upts)) + len(self._names) + len(self.fods) + len(self.publics)
+
+    def _path_id(self, path):
+        path_id = self._prefix_ids.get(path)
+        if path_id is None:
+            path_id = self._prefix_ids[path] = len(self._prefixes)
+            self._prefixes.append(path)
+        return path_id
+
+    def append(self, entry, dir_path=None):
+        '''
+        添加一项
+
+        :param entry: 列举目录返回的子目录或对象信息字典
+        :param dir_path: 所在目录路径，默认从entry的全路径'na'获取
+        '''
+        name = entry.get('name', '')
+        if dir_path is None:
+            dir_path = entry.get('na', name).rpartition('/')[0]
+
+        self._names += name.encode('utf-8')
+        self._name_offsets.append(len(self._names))
+        self.path_ids.append(self._path_id(dir_path.strip('/')))
+        self.sizes.append(entry.get('si') or 0)
+        self.fods.append(1 if entry.get('fod') else 0)
+        self.ults.append(parse_time(entry.get('ult')))
+        self.upts.append(parse_time(entry.get('upt')))
+        self.publics.append(1 if entry.get('access_permission') in ('公有', 'public') else 0)
+
+    def extend(self, entries, dir_path=None):
+        '''
+        添加多项
+
+        :param entries: 列举目录返回的子目录或对象信息字典的可迭代对象
+        :param dir_path: 所在目录路径，默认从每项的全路径'na'获取
+        '''
+        for entry in entries:
+            self.append(entry, dir_path=dir_path)
+
+    def name(self, i):
+        '''第i项的名称'''
+        return self._names[self._name_offsets[i]:self._name_offsets[i + 1]].decode('utf-8')
+
+    def path(self, i):
+        '''第i项的全路径'''
+        return '/'.join([self._prefixes[self.path_ids[i]], self.name(i)]).lstrip('/')
+
+    def names(self):
+        '''所有项的名称'''
+        return [self.name(i) for i in range(len(self))]
+
+    def paths(self):
+        '''所有项的全路径'''
+        return [self.path(i) for i in range(len(self))]
+
+    def take(self, indices):
+        '''
+        按序号选取多项
+
+        :param indices: 序号的可迭代对象
+        :return:
+            CompactListing()
+        '''
+        listing = CompactListing()
+        names, offsets = self._names, self._name_offsets
+        for i in indices:
+            listing._names += names[offsets[i]:offsets[i + 1]]
+            listing._name_offsets.append(len(listing._names))
+            listing.path_ids.append(listing._path_id(self._prefixes[self.path_ids[i]]))
+            listing.sizes.append(self.sizes[i])
+            listing.fods.append(self.fods[i])
+            listing.ults.append(self.ults[i])
+            listing.upts.append(self.upts[i])
+            listing.publics.append(self.publics[i])
+        return listing
+
+    def select(self, min_size=None, max_size=None, fod=None, prefix=None, public=None):
+        '''
+        按条件在列上筛选，返回满足所有条件的项的序号，不创建每项的对象
+
+        :param min_size: 大小大于min_size
+        :param max_size: 大小不大于max_size
+        :param fod: True只选取对象，False只选取目录
+        :param prefix: 名称以prefix开头
+        :param public: True只选取公有访问权限，False只选取私有
+        :return:
+            序号的array('Q')
+        '''
+        indices = range(len(self))
+        if fod is not None:
+            flag = 1 if fod else 0
+            fods = self.fods
+            indices = [i for i in indices if fods[i] == flag]
+        if public is not None:
+            flag = 1 if public else 0
+            publics = self.publics
+            indices = [i for i in indices if publics[i] == flag]
+        if min_size is not None:
+            sizes = self.sizes
+            indices = [i for i in indices if sizes[i] > min_size]
+        if max_size is not None:
+            sizes = self.sizes
+            indices = [i for i in indices if sizes[i] <= max_size]
+        if prefix:
+            p = prefix.encode('utf-8')
+            names, offsets = self._names, self._name_offsets
+            indices = [i for i in indices if names.startswith(p, offsets[i], offsets[i + 1])]
+
+        return array('Q', indices)
+
+    def filter(self, min_size=None, max_size=None, fod=None, prefix=None, public=None):
+        '''
+        按条件筛选，参数同select()
+
+        :return:
+            CompactListing()
+        '''
+        return self.take(self.select(min_size=min_size, max_size=max_size, fod=fod, prefix=prefix, public=public))
@@ -0,0 +1,79 @@
+import binascii
+import io
+import os
+
+
+class ChunkFormData():
+    '''
+    分片上传的multipart/form-data请求体
+
+    请求体分段流式发送：表单字段chunk_offset、chunk_size和分片数据，不会把整个请求体拼接在内存中；
+    bytes、memoryview等分片数据直接发送到socket，不在用户空间拷贝，文件类对象分片按block_size分块读取发送；
+    实现了__len__，请求时可以预先计算Content-Length；可以多次迭代，请求重试时重新发送
+    '''
+    def __init__(self, offset, chunk, boundary=None, block_size=1024**2):
+        '''
+        :param offset: 分片偏移量
+        :param chunk: 分片数据，bytes、bytearray、memoryview，或者二进制方式打开的文件类对象(从当前位置读取到末尾)
+        :param boundary: multipart边界字符串，默认随机生成
+        :param block_size: 文件类对象分片每次读取发送的大小
+        '''
+        self.boundary = boundary or binascii.hexlify(os.urandom(16)).decode('ascii')
+        self.block_size = block_size
+        self._file = None
+        if hasattr(chunk, 'read'):
+            if hasattr(chunk, 'seekable') and chunk.seekable():
+                self._file = chunk
+                self._file_start = chunk.tell()
+                self._size = chunk.seek(0, io.SEEK_END) - self._file_start
+                chunk.seek(self._file_start)
+            else:
+                chunk = chunk.read()
+
+        if self._file is None:
+            self._chunk = memoryview(chunk).cast('B')
+            self._size = len(self._chunk)
+
+        self._head = self._encode_fields(offset=offset, size=self._size)
+        self._tail = '\r\n--{0}--\r\n'.format(self.boundary).encode('ascii')
+
+    @property
+    def chunk_size(self):
+        '''分片数据大小'''
+        return self._size
+
+    @property
+    def content_type(self):
+        return 'multipart/form-data; boundary={0}'.format(self.boundary)
+
+    def _encode_fields(self, offset, size):
+        lines = []
+        for name, value in (('chunk_offset', offset), ('chunk_size', size)):
+            lines.append('--{0}\r\nContent-Disposition: form-data; name="{1}"\r\n\r\n{2}\r\n'.format(
+                self.boundary, name, value))
+
+        lines.append('--{0}\r\nContent-Disposition: form-data; name="chunk"; filename="chunk"\r\n'
+                     'Content-Type: application/octet-stream\r\n\r\n'.format(self.boundary))
+        return ''.join(lines).encode('utf-8')
+
+    def __len__(self):
+        return len(self._head) + self._size + len(self._tail)
+
+    def __iter__(self):
+        yield self._head
+        if self._file is None:
+            yield self._chunk
+        else:
+            yield from self._iter_file()
+        yield self._tail
+
+    def _iter_file(self):
+        self._file.seek(self._file_start)
+        remaining = self._size
+        while remaining > 0:
+            data = self._file.read(min(self.block_size, remaining))
+            if not data:
+                raise IOError('分片文件数据大小与chunk_size不一致，文件可能已被修改')
+
+            remaining -= len(data)
+            yield data
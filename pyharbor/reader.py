@@ -0,0 +1,182 @@
+import io
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .core import ApiCore, ApiUrlBuilder
+
+
+class HarborObjectReader(io.RawIOBase):
+    '''
+    只读、可随机访问(seek)的远程对象文件类，可用于zipfile、tarfile、Parquet等需要随机访问的读取器，
+    只下载实际读取到的数据块
+
+    对象数据按固定大小的块下载，最近访问的块保存在LRU缓存中；顺序读取时后台线程预先下载之后的块
+    '''
+    def __init__(self, bucket_name, obj_name, apicore=None, block_size=1024**2, cache_blocks=32, readahead=2):
+        '''
+        :param bucket_name: 存储桶名称
+        :param obj_name: 对象全路径名称
+        :param apicore: ApiCore对象，用于共享连接池，默认新建
+        :param block_size: 数据块大小
+        :param cache_blocks: LRU缓存的数据块数量
+        :param readahead: 顺序读取时预先下载的数据块数量，0为不预先下载
+        '''
+        super().__init__()
+        if block_size <= 0:
+            raise ValueError('block_size must be a positive integer.')
+
+        self.name = obj_name
+        self.apicore = apicore or ApiCore()
+        self.block_size = block_size
+        self.cache_blocks = max(cache_blocks, readahead + 1)
+        self.readahead = readahead
+        self._obj_url = ApiUrlBuilder().build_obj_url(bucket_name=bucket_name, path=obj_name, obj_name='')
+        self._size = None
+        self._pos = 0
+        self._last_index = None
+        self._cache = OrderedDict()     # {block index: bytes}
+        self._prefetching = {}          # {block index: future}
+        self._executor = ThreadPoolExecutor(max_workers=readahead) if readahead > 0 else None
+
+    def __str__(self):
+        return 'HarborObjectReader({0})'.format(self._obj_url)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    @property
+    def size(self):
+        '''对象大小'''
+        if self._size is None:
+            self._get_block(0)
+
+        return self._size
+
+    def tell(self):
+        self._checkClosed()
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._checkClosed()
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError('invalid whence ({0}, should be 0, 1 or 2)'.format(whence))
+
+        if pos < 0:
+            raise ValueError('negative seek position {0}'.format(pos))
+
+        self._pos = pos
+        return pos
+
+    def readinto(self, b):
+        self._checkClosed()
+        view = memoryview(b).cast('B')
+        n = min(len(view), max(self.size - self._pos, 0))
+        copied = 0
+        while copied < n:
+            index, block_offset = divmod(self._pos, self.block_size)
+            block = self._get_block(index)
+            piece = memoryview(block)[block_offset:block_offset + n - copied]
+            if not piece:
+                break
+
+            view[copied:copied + len(piece)] = piece
+            copied += len(piece)
+            self._pos += len(piece)
+
+        return copied
+
+    def read(self, size=-1):
+        self._checkClosed()
+        remaining = max(self.size - self._pos, 0)
+        if size is None or size < 0:
+            size = remaining
+        else:
+            size = min(size, remaining)     # 不按请求的大小分配超过对象剩余部分的内存
+
+        buf = bytearray(size)
+        n = self.readinto(buf)
+        del buf[n:]
+        return bytes(buf)
+
+    def readall(self):
+        return self.read()
+
+    def close(self):
+        if not self.closed:
+            if self._executor is not None:
+                for future in self._prefetching.values():
+                    future.cancel()
+                self._executor.shutdown(wait=False)
+            self._prefetching.clear()
+            self._cache.clear()
+
+        super().close()
+
+    def _fetch_block(self, index):
+        '''
+        下载一个数据块
+
+        :param index: 数据块序号
+        :return:
+            (block, obj_size)
+        :raises FileNotFoundError: 对象不存在
+        :raises IOError: 下载失败
+        '''
+        ok, result = self.apicore.download_one_chunk(obj_url=self._obj_url, offset=index * self.block_size,
+                                                     size=self.block_size)
+        if ok is None:
+            raise FileNotFoundError(result)
+        elif not ok:
+            raise IOError(result)
+
+        return result.get('chunk'), result.get('obj_size', 0)
+
+    def _get_block(self, index):
+        '''
+        从缓存或服务器获取一个数据块，顺序读取时在后台预先下载之后的数据块
+        '''
+        block = self._cache.get(index)
+        if block is not None:
+            self._cache.move_to_end(index)
+        else:
+            future = self._prefetching.pop(index, None)
+            if future is not None:
+                block, obj_size = future.result()
+            else:
+                block, obj_size = self._fetch_block(index)
+
+            self._size = obj_size
+            self._cache[index] = block
+            while len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+
+        if self._last_index is not None and index == self._last_index + 1:
+            self._readahead(index)
+        self._last_index = index
+        return block
+
+    def _readahead(self, index):
+        if self._executor is None:
+            return
+
+        # 丢弃不再需要的预先下载
+        wanted = range(index + 1, index + 1 + self.readahead)
+        for i in [i for i in self._prefetching if i not in wanted]:
+            self._prefetching.pop(i).cancel()
+
+        n_blocks = (self._size + self.block_size - 1) // self.block_size
+        for i in range(index + 1, min(index + 1 + self.readahead, n_blocks)):
+            if i not in self._cache and i not in self._prefetching:
+                self._prefetching[i] = self._executor.submit(self._fetch_block, i)
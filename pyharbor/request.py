@@ -1,9 +1,16 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
 from requests import sessions, PreparedRequest
-from requests.exceptions import (ConnectionError, RequestException, InvalidURL)
-from urllib.parse import unquote
+from requests.adapters import HTTPAdapter
+from requests.exceptions import (ConnectionError, RequestException)
+from urllib.parse import quote, quote_plus, unquote
 
 from . import auth_key
 from .config import configs
+from .deadline import Deadline, DeadlineExceeded
 
 
 class Auth(object):
@@ -37,27 +44,272 @@ class Auth(object):
             raise ValueError('access_key must be string.')
                 
     def get_url_path(self, url, params):
-        pr = PreparedRequest()
-        pr.prepare_url(url=url, params=params)
-        url_path = unquote(pr.path_url) # 解码url
+        _, url_path = prepare_url(url=url, params=params)
         return url_path
 
     def get_auth_header_value(self, method, url, params, *args, **kwargs):
         path_url = self.get_url_path(url=url, params=params)
+        return self.get_auth_header_value_by_path(method=method, path_url=path_url)
+
+    def get_auth_header_value_by_path(self, method, path_url):
+        '''
+        :param method: 请求方法
+        :param path_url: prepare_url()返回的解码后的url路径和查询参数
+        '''
+        # 带查询参数的路径(分片下载的偏移量、列举目录的分页等)几乎不会重复，不缓存，避免一次性的项挤出可复用的项
+        if '?' in path_url:
+            return self._sign(method=method, path_url=path_url)
+
+        cache_key = (self.access_key, self.secret_key, method.upper(), path_url)
+        value = token_cache.get(cache_key)
+        if value is None:
+            value = self._sign(method=method, path_url=path_url)
+            token_cache.set(cache_key, value)
+
+        return value
+
+    def _sign(self, method, path_url):
         key = auth_key.AuthKey(access_key=self.access_key, secret_key=self.secret_key)
-        auth_key_str = key.auth_key(path_of_url=path_url, method=method)
+        auth_key_str = key.auth_key(path_of_url=path_url, method=method, timedelta=token_cache.timedelta)
         return key.auth_header_value(auth_key_str)
 
 
+_SAFE_PATH_CHARS = "!$&'()*+,;=:@/~"    # url路径中不编码的字符，与urllib3、requests一致
+_url_prefixes = {}                      # {'scheme://netloc': 规范化后的'scheme://netloc'}
+
+
+def _encode_params(params):
+    '''
+    编码查询参数，结果与requests相同；值为str、int、bool或None的dict直接编码
+    '''
+    if isinstance(params, dict) and all(isinstance(k, str) and (v is None or isinstance(v, (str, int)))
+                                        for k, v in params.items()):
+        return '&'.join(['{0}={1}'.format(quote_plus(k), quote_plus(str(v)))
+                         for k, v in params.items() if v is not None])
+
+    return PreparedRequest._encode_params(params)
+
+
+def _fast_prepare_url(url, params):
+    '''
+    常见url的快速编码，不符合快速编码条件时返回None
+    '''
+    if not isinstance(url, str) or isinstance(params, (str, bytes)) or hasattr(params, 'read'):
+        return None
+
+    i = url.find('://')
+    if i not in (4, 5):     # http或https
+        return None
+
+    j = url.find('/', i + 3)
+    if j < 0:
+        return None
+
+    prefix, path = url[:j], url[j:]
+    if '%' in path or '?' in path or '#' in path:
+        return None
+    if '/.' in path:
+        segments = path.split('/')
+        if '.' in segments or '..' in segments:
+            return None
+
+    base = _url_prefixes.get(prefix)
+    if base is None:
+        if not prefix[:i].lower() in ('http', 'https') or '?' in prefix or '#' in prefix:
+            return None
+
+        pr = PreparedRequest()
+        pr.prepare_url(url=prefix + '/', params=None)
+        base = pr.url[:-1]
+        if len(_url_prefixes) >= 64:
+            _url_prefixes.clear()
+        _url_prefixes[prefix] = base
+
+    query = _encode_params(params) if params is not None else ''
+    encoded_path = quote(path, safe=_SAFE_PATH_CHARS)
+    if query:
+        return '{0}{1}?{2}'.format(base, encoded_path, query), '{0}?{1}'.format(path, unquote(query))
+
+    return base + encoded_path, path
+
+
+def prepare_url(url, params=None):
+    '''
+    编码请求的url和查询参数，结果与requests.PreparedRequest.prepare_url()完全相同，签名和发送请求共用，每个请求只编码一次；
+    路径不含'%'、'?'、'#'和'.'、'..'路径段的http(s) url直接编码，不经过PreparedRequest，其他url仍由PreparedRequest编码
+
+    :param url: url
+    :param params: 查询参数，dict或者(key, value)列表
+    :return:
+        (url, path_url)
+        url: 编码后的完整url，发送请求时不需再附加params
+        path_url: 解码后的url路径和查询参数，用于签名
+    '''
+    prepared = _fast_prepare_url(url, params)
+    if prepared is not None:
+        return prepared
+
+    pr = PreparedRequest()
+    pr.prepare_url(url=url, params=params)
+    return pr.url, unquote(pr.path_url)   # 解码url
+
+
+class TokenCache():
+    '''
+    已签名的Authorization值的LRU缓存，可在多线程间共享
+
+    安全凭证只与请求方法和url路径(含查询参数)有关，同一(access_key, 方法, 路径)的请求，
+    如同一对象的多个分片上传(偏移量在请求体中)，在凭证过期前margin秒之前重复使用已签名的值，不再重新签名
+
+    只缓存不带查询参数的路径，带查询参数的请求(分片下载、分页列举等)每次都不同，直接签名；
+    可复用的项是正在上传的对象和反复访问的路径，同时进行的上传数远小于1024，默认maxsize足够，
+    每项约几百字节，缓存最多占用几百KB；遍历大量不同路径时旧的项按LRU淘汰
+    '''
+    def __init__(self, maxsize=1024, timedelta=3600, margin=300):
+        '''
+        :param maxsize: 最多缓存的凭证数量，0为不缓存
+        :param timedelta: 签名的凭证有效期(秒)
+        :param margin: 凭证过期前的安全时间(秒)，剩余有效期不足margin秒的凭证不再使用
+        '''
+        self.maxsize = maxsize
+        self.timedelta = timedelta
+        self.margin = margin
+        self._cache = OrderedDict()     # {key: (value, expire time)}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, key):
+        '''
+        :return:
+            缓存的有效值，无有效值时返回None
+        '''
+        with self._lock:
+            item = self._cache.get(key)
+            if item is None:
+                return None
+
+            value, expire = item
+            if time.time() >= expire:
+                del self._cache[key]
+                return None
+
+            self._cache.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        '''
+        缓存一个刚签名的值
+        '''
+        if self.maxsize <= 0:
+            return
+
+        expire = time.time() + self.timedelta - self.margin
+        with self._lock:
+            self._cache[key] = (value, expire)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+token_cache = TokenCache()
+
+
 def get_auth():
     return Auth(access_key=configs.ACCESS_KEY, secret_key=configs.SECRET_KEY)
 
 
-def request(method, url, access_key=None, secret_key=None, **kwargs):
+class HarborSession(sessions.Session):
+    '''
+    带连接池的会话，多个请求之间复用TCP/TLS连接(keep-alive)，可以在多线程间共享
+    '''
+    def __init__(self, pool_connections=None, pool_maxsize=None, pool_block=None):
+        '''
+        :param pool_connections: 缓存的主机(host)连接池数量，默认configs.POOL_CONNECTIONS
+        :param pool_maxsize: 每个主机(host)连接池保持的最大连接数，默认configs.POOL_MAXSIZE
+        :param pool_block: 连接数达到pool_maxsize时是否阻塞等待空闲连接，默认configs.POOL_BLOCK
+        '''
+        super().__init__()
+        self.pool_connections = pool_connections or configs.POOL_CONNECTIONS or 10
+        self.pool_maxsize = pool_maxsize or configs.POOL_MAXSIZE or 10
+        self.pool_block = bool(configs.POOL_BLOCK) if pool_block is None else pool_block
+
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+
+_DEFAULT_TIMEOUT = object()             # request()未指定timeout参数时使用全局配置的超时时间
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def get_default_session():
+    '''
+    进程内共享的默认连接池会话
+
+    未指定会话的ApiCore、Directory、Bucket等共用此会话，可在多线程间共享，进程退出前不关闭；
+    fork出的子进程第一次使用时新建自己的会话，不使用从父进程继承的连接
+    '''
+    global _default_session
+
+    if _default_session is None:
+        with _default_session_lock:
+            if _default_session is None:
+                _default_session = HarborSession()
+
+    return _default_session
+
+
+def _reset_default_session():
+    '''
+    fork后在子进程中丢弃继承的默认会话和锁，不关闭会话，避免关闭与父进程共用的连接
+    '''
+    global _default_session, _default_session_lock
+
+    _default_session = None
+    _default_session_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_default_session)
+
+
+def get_default_timeout():
+    '''
+    全局配置的请求超时时间
+
+    :return:
+        (连接超时, 读取超时)
+    '''
+    return (configs.CONNECT_TIMEOUT, configs.READ_TIMEOUT)
+
+
+def request(method, url, access_key=None, secret_key=None, session=None, retry=None, deadline=None, idempotent=None,
+            on_attempt=None, **kwargs):
     """Constructs and sends a :class:`Request <Request>`.
 
     :param method: method for the new :class:`Request` object.
     :param url: URL for the new :class:`Request` object.
+    :param retry: (optional) :class:`RetryPolicy` deciding whether and when a failed
+        attempt is retried, defaults to a single attempt. The body is re-sent on retry,
+        so it must be re-iterable (bytes, dict or :class:`ChunkFormData`).
+    :param idempotent: (optional) Whether the request may be safely re-sent. Defaults to
+        :meth:`RetryPolicy.is_idempotent` of the method, so POST and PATCH are not retried.
+    :param deadline: (optional) :class:`Deadline` or seconds shared by all attempts.
+        Each attempt's timeouts are capped by the remaining time, no attempt or retry
+        is started past it, and :class:`DeadlineExceeded` is raised instead.
+    :param on_attempt: (optional) Callable ``on_attempt(response, exception, seconds)``
+        called after every attempt, including retried ones, with either the response
+        or the raised :class:`RequestException` and the attempt's duration.
+    :param session: (optional) :class:`HarborSession` used to send the request,
+        defaults to the shared session returned by :func:`get_default_session`.
     :param params: (optional) Dictionary, list of tuples or bytes to send
         in the body of the :class:`Request`.
     :param data: (optional) Dictionary, list of tuples, bytes, or file-like
@@ -73,7 +325,7 @@ def request(method, url, access_key=None, secret_key=None, **kwargs):
     :param auth: (optional) Auth tuple to enable Basic/Digest/Custom HTTP Auth.
     :param timeout: (optional) How many seconds to wait for the server to send data
         before giving up, as a float, or a :ref:`(connect timeout, read
-        timeout) <timeouts>` tuple.
+        timeout) <timeouts>` tuple. Defaults to the CONNECT_TIMEOUT and READ_TIMEOUT settings.
     :type timeout: float or tuple
     :param allow_redirects: (optional) Boolean. Enable/disable GET/OPTIONS/POST/PUT/PATCH/DELETE/HEAD redirection. Defaults to ``True``.
     :type allow_redirects: bool
@@ -94,18 +346,63 @@ def request(method, url, access_key=None, secret_key=None, **kwargs):
         if not access_key or not secret_key:
             raise ValueError('access_key or secret_key is invalid.')
 
+    # url和查询参数只编码一次，签名的路径与发送的url一致
+    url, path_url = prepare_url(url=url, params=kwargs.pop('params', None))
     auth = get_auth()
-    key = auth.get_auth_header_value(method=method, url=url, params=kwargs.get('params', None)) 
+    key = auth.get_auth_header_value_by_path(method=method, path_url=path_url)
 
     headers = kwargs.get('headers', {})
     headers['Authorization'] = key
     kwargs['headers'] = headers
 
-    # By using the 'with' statement we are sure the session is closed, thus we
-    # avoid leaving sockets open which can trigger a ResourceWarning in some
-    # cases, and look like a memory leak in others.
-    with sessions.Session() as session:
-        return session.request(method=method, url=url, **kwargs)
+    # 复用连接池中的连接，避免每个请求都重新建立TCP连接和TLS握手
+    if session is None:
+        session = get_default_session()
+
+    # 未指定超时时间时，使用全局配置，避免连接停滞时请求永久阻塞；明确指定的timeout=None为不超时
+    timeout = kwargs.pop('timeout', _DEFAULT_TIMEOUT)
+    if timeout is _DEFAULT_TIMEOUT:
+        timeout = get_default_timeout()
+    deadline = Deadline.make(deadline)
+
+    def send():
+        t = timeout if deadline is None else deadline.timeout(timeout)
+        if on_attempt is None:
+            return session.request(method=method, url=url, timeout=t, **kwargs)
+
+        start = time.monotonic()
+        try:
+            r = session.request(method=method, url=url, timeout=t, **kwargs)
+        except RequestException as e:
+            on_attempt(None, e, time.monotonic() - start)
+            raise
+        on_attempt(r, None, time.monotonic() - start)
+        return r
+
+    if retry is None or not (retry.is_idempotent(method) if idempotent is None else idempotent):
+        return send()
+
+    retry.new_request()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            r = send()
+        except DeadlineExceeded:
+            raise
+        except RequestException as e:
+            delay = retry.get_delay(attempt, exception=e)
+            if delay is None:
+                raise
+            if deadline is not None and delay >= deadline.remaining():
+                raise DeadlineExceeded(str(e)) from e
+        else:
+            delay = retry.get_delay(attempt, response=r)
+            if delay is None or (deadline is not None and delay >= deadline.remaining()):
+                return r
+            r.close()
+
+        time.sleep(delay)
 
 
 def get(url, params=None, **kwargs):
@@ -0,0 +1,136 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from requests.exceptions import ConnectionError, Timeout
+
+
+class RetryPolicy():
+    '''
+    请求重试策略，可在多线程间共享
+
+    可重试的请求(网络连接错误、超时，或状态码为RETRY_STATUSES之一)等待一段时间后重试，
+    等待时间按指数增长并完全随机化(full jitter)，避免大量客户端同时重试；服务器返回Retry-After时至少等待其指定的时间
+
+    重试预算：每个请求向预算中存入budget_ratio个令牌，每次重试消耗一个令牌，令牌不足时不再重试，
+    服务器过载大量请求失败时重试的请求数不超过正常请求数的budget_ratio倍，不会因重试加重服务器负载
+
+    只重试幂等方法(RETRY_METHODS)的请求：POST、PATCH等请求超时或服务器返回5xx时可能已经生效，
+    重试会得到“不存在”、“已存在”等错误结果，因此不重试；可以重复发送的请求(如按偏移量写入的上传分片、创建目录)
+    可由调用者指定为幂等
+    '''
+    RETRY_STATUSES = frozenset([408, 429, 500, 502, 503, 504])
+    RETRY_EXCEPTIONS = (ConnectionError, Timeout)
+    RETRY_METHODS = frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'])
+
+    def __init__(self, max_attempts=4, backoff=0.2, max_backoff=10.0, budget_ratio=0.1, budget=10,
+                 retry_statuses=None, retry_exceptions=None, retry_methods=None):
+        '''
+        :param max_attempts: 每个请求最多尝试的次数(含第一次)，1为不重试
+        :param backoff: 第一次重试前的最长等待时间(秒)，之后每次重试翻倍
+        :param max_backoff: 重试前的最长等待时间(秒)，服务器要求的Retry-After超过此时间时不再重试
+        :param budget_ratio: 每个请求存入预算的令牌数，即重试请求数与请求数比例的上限
+        :param budget: 预算的令牌数上限，也是初始的令牌数
+        :param retry_statuses: 可重试的状态码，默认RETRY_STATUSES
+        :param retry_exceptions: 可重试的异常类型，默认网络连接错误和超时
+        :param retry_methods: 可重试的请求方法，默认RETRY_METHODS
+        '''
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget_ratio = budget_ratio
+        self.budget = budget
+        self.retry_statuses = self.RETRY_STATUSES if retry_statuses is None else frozenset(retry_statuses)
+        self.retry_exceptions = self.RETRY_EXCEPTIONS if retry_exceptions is None else tuple(retry_exceptions)
+        self.retry_methods = self.RETRY_METHODS if retry_methods is None else frozenset(
+            m.upper() for m in retry_methods)
+        self._tokens = float(budget)
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return 'RetryPolicy(max_attempts={0}, tokens={1:.1f})'.format(self.max_attempts, self._tokens)
+
+    @property
+    def tokens(self):
+        '''预算中剩余的令牌数'''
+        return self._tokens
+
+    def new_request(self):
+        '''
+        开始一个新的请求(不含重试)，向预算存入令牌
+        '''
+        with self._lock:
+            self._tokens = min(self.budget, self._tokens + self.budget_ratio)
+
+    def is_idempotent(self, method):
+        '''
+        请求方法是否可重试
+
+        :param method: 请求方法
+        '''
+        return method.upper() in self.retry_methods
+
+    def is_retryable(self, response=None, exception=None):
+        '''
+        请求结果是否可重试
+
+        :param response: 请求的响应
+        :param exception: 请求时发生的异常
+        '''
+        if exception is not None:
+            return isinstance(exception, self.retry_exceptions)
+
+        return response is not None and response.status_code in self.retry_statuses
+
+    def get_delay(self, attempt, response=None, exception=None):
+        '''
+        第attempt次尝试失败后，重试前需要等待的时间；可以重试时消耗一个预算令牌
+
+        :param attempt: 已尝试的次数，从1开始
+        :param response: 本次尝试的响应
+        :param exception: 本次尝试发生的异常
+        :return:
+            等待的秒数，不重试时返回None
+        '''
+        if attempt >= self.max_attempts or not self.is_retryable(response=response, exception=exception):
+            return None
+
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        retry_after = get_retry_after(response)
+        if retry_after is not None:
+            if retry_after > self.max_backoff:
+                return None
+            delay = max(delay, retry_after)
+
+        with self._lock:
+            if self._tokens < 1:
+                return None
+            self._tokens -= 1
+
+        return delay
+
+
+def get_retry_after(response):
+    '''
+    响应头Retry-After要求的等待时间
+
+    :return:
+        秒数，没有或无效的Retry-After时返回None
+    '''
+    if response is None:
+        return None
+
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
@@ -0,0 +1,9 @@
+import pytest
+
+from pyharbor.config import set_global_settings
+
+
+@pytest.fixture(autouse=True, scope='session')
+def global_settings():
+    '''ApiCore和缓存读取全局配置，测试使用默认配置'''
+    set_global_settings({})
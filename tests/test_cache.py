@@ -0,0 +1,205 @@
+'''
+TTLCache、MetadataCache、DirectoryCache测试，以及create_path()使用目录缓存的行为
+
+create_path()的测试用内存中的目录集合代替服务器
+'''
+import pytest
+
+from pyharbor import cache
+from pyharbor.cache import TTLCache, MetadataCache, DirectoryCache
+from pyharbor.core import ApiCore, get_path_breadcrumb
+
+
+class FakeClock():
+    '''代替cache模块的time，手动推进monotonic()'''
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = FakeClock()
+    monkeypatch.setattr(cache, 'time', c)
+    return c
+
+
+def test_ttl_expire(clock):
+    c = TTLCache(ttl=10)
+    c.set('a', 1)
+    clock.now += 9.9
+    assert c.get('a') == 1
+    clock.now += 0.1
+    assert c.get('a') is None
+    assert len(c) == 0
+
+
+def test_lru_evict(clock):
+    c = TTLCache(maxsize=2, ttl=10)
+    c.set('a', 1)
+    c.set('b', 2)
+    c.get('a')
+    c.set('c', 3)
+    assert c.get('b') is None
+    assert c.get('a') == 1 and c.get('c') == 3
+
+
+def test_maxsize_zero_disables_cache():
+    c = TTLCache(maxsize=0)
+    c.set('a', 1)
+    assert c.get('a') is None
+
+
+def test_metadata_invalidate(clock):
+    c = MetadataCache(ttl=10)
+    for path in ('a', 'a/b', 'a/b/c', 'ab'):
+        c.set_metadata('bucket', path, ({}, 200, 'ok'))
+    c.set_metadata('other', 'a/b', ({}, 200, 'ok'))
+
+    c.invalidate('bucket', '/a/b/')
+    assert c.get_metadata('bucket', 'a/b') is None
+    assert c.get_metadata('bucket', 'a/b/c') is not None
+
+    c.invalidate('bucket', 'a', recursive=True)
+    assert c.get_metadata('bucket', 'a') is None
+    assert c.get_metadata('bucket', 'a/b/c') is None
+    assert c.get_metadata('bucket', 'ab') is not None
+    assert c.get_metadata('other', 'a/b') is not None
+
+
+def test_metadata_fill_from_listing(clock):
+    c = MetadataCache(ttl=10)
+    c.fill_from_listing('bucket', '/d/', [{'name': 'o', 'fod': True}, {'name': 'sub', 'fod': False}])
+    data, code, msg = c.get_metadata('bucket', 'd/o')
+    assert code == 200 and data['data']['name'] == 'o'
+    assert c.get_metadata('bucket', 'd/sub') is not None
+
+    clock.now += 10
+    assert c.get_metadata('bucket', 'd/o') is None
+
+
+def test_directory_add_and_expire(clock):
+    c = DirectoryCache(ttl=10)
+    c.add('bucket', 'a/b/c')
+    assert c.exists('bucket', 'a') and c.exists('bucket', 'a/b') and c.exists('bucket', '/a/b/c/')
+    assert c.exists('bucket', '')   # 存储桶根目录总是存在
+    assert not c.exists('bucket', 'a/b/c/d')
+    assert not c.exists('other', 'a')
+
+    clock.now += 10
+    assert not c.exists('bucket', 'a')
+
+
+def test_directory_ttl_zero_disables_cache():
+    c = DirectoryCache(ttl=0)
+    c.add('bucket', 'a')
+    assert not c.exists('bucket', 'a')
+
+
+def test_directory_fill_from_listing(clock):
+    c = DirectoryCache(ttl=10)
+    c.fill_from_listing('bucket', 'a', [{'name': 'sub', 'fod': False}, {'name': 'obj', 'fod': True}])
+    assert c.exists('bucket', 'a') and c.exists('bucket', 'a/sub')
+    assert not c.exists('bucket', 'a/obj')
+
+
+def test_directory_missing_and_invalidate(clock):
+    c = DirectoryCache(ttl=10)
+    dirs = get_path_breadcrumb('a/b/c')
+    assert c.missing('bucket', dirs) == dirs
+
+    c.add('bucket', 'a/b')
+    assert c.missing('bucket', dirs) == dirs[2:]
+
+    c.invalidate('bucket', 'a', recursive=True)
+    assert not c.exists('bucket', 'a/b')
+    assert c.missing('bucket', dirs) == dirs
+
+
+def test_directory_replan(clock):
+    c = DirectoryCache(ttl=10)
+    dirs = get_path_breadcrumb('a/b/c')
+    c.add('bucket', 'a/b')
+    todo = c.missing('bucket', dirs)
+
+    # 跳过了缓存中的目录，父目录不存在时从头创建
+    assert c.replan('bucket', dirs, todo, failed=todo[0], code=404) == dirs
+    assert not c.exists('bucket', 'a/b')
+
+    # 已从头创建或其他错误时创建失败
+    assert c.replan('bucket', dirs, dirs, failed=dirs[0], code=404) is None
+    c.add('bucket', 'a/b')
+    assert c.replan('bucket', dirs, todo, failed=todo[0], code=500) is None
+
+
+class FakeDirApiCore(ApiCore):
+    '''
+    用内存中的目录集合代替服务器：创建目录时父目录必须存在，上传和列举时目录必须存在
+    '''
+    def __init__(self):
+        super().__init__()
+        self.dirs = set()
+        self.created = []
+
+    def _dir_path(self, dir_url):
+        return dir_url[len(self._url_builder.build_dir_url('bucket')):].strip('/')
+
+    def create_dir_by_url(self, dir_url):
+        path = self._dir_path(dir_url)
+        parent = path.rpartition('/')[0]
+        if parent and parent not in self.dirs:
+            return (False, 404, 'parent not found')
+
+        self.dirs.add(path)
+        self.created.append(path)
+        return (True, 201, 'created')
+
+    def get_objs_and_subdirs_by_url(self, dir_url, limit=None, offset=None):
+        if self._dir_path(dir_url) not in self.dirs:
+            return (False, 404, 'not found')
+        return ({'files': []}, 200, 'ok')
+
+    def upload_one_chunk(self, obj_url, offset, chunk, **kwargs):
+        return (None, 404, 'dir not found')
+
+
+def test_create_path_skips_cached_dirs():
+    core = FakeDirApiCore()
+    assert core.create_path('bucket', dir_path='a/b')
+    assert core.created == ['a', 'a/b']
+
+    core.created.clear()
+    assert core.create_path('bucket', dir_path='a/b/c')
+    assert core.created == ['a/b/c']
+
+
+def test_create_path_recreates_externally_deleted_dirs():
+    core = FakeDirApiCore()
+    assert core.create_path('bucket', dir_path='a/b')
+    core.dirs.clear()   # 其他客户端删除了目录
+
+    core.created.clear()
+    assert core.create_path('bucket', dir_path='a/b/c')
+    assert core.created == ['a', 'a/b', 'a/b/c']
+
+
+@pytest.mark.parametrize('fail', [
+    lambda core: core.write_one_chunk('bucket', 'a/b', 'obj', 0, b'data'),
+    lambda core: core.upload_stream('bucket', 'a/b', 'obj', b'data'),
+    lambda core: core.get_objs_and_subdirs('bucket', 'a/b'),
+])
+def test_not_found_invalidates_cached_dir(fail):
+    core = FakeDirApiCore()
+    assert core.create_path('bucket', dir_path='a/b')
+    core.dirs.clear()   # 其他客户端删除了目录
+
+    core.created.clear()
+    assert core.create_path('bucket', dir_path='a/b')
+    assert core.created == []   # 所有目录都在缓存中，不发送请求
+
+    fail(core)
+    assert not core.dir_cache.exists('bucket', 'a/b')
+    assert core.create_path('bucket', dir_path='a/b')
+    assert core.created == ['a', 'a/b']
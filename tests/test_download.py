@@ -0,0 +1,120 @@
+'''
+分片下载和HarborObjectReader测试，用内存中的假服务器代替网络请求
+
+下载失败时文件截断到从start开始连续下载成功的偏移量处，按文件长度即可续传
+'''
+import os
+import time
+
+import pytest
+
+from pyharbor.core import ApiCore
+from pyharbor.reader import HarborObjectReader
+
+
+DATA = bytes(range(256)) * 40   # 10240字节，分片大小1024时10个分片
+
+
+class FakeDownloadApiCore(ApiCore):
+    '''
+    download_one_chunk()从内存中的对象读取分片，不发送请求
+
+    :param fail: 下载失败的分片偏移量集合
+    :param delay: {分片偏移量: 下载耗时秒数}，用于打乱分片完成的顺序
+    '''
+    def __init__(self, data=DATA, fail=(), delay=None):
+        super().__init__()
+        self.data = data
+        self.fail = set(fail)
+        self.delay = delay or {}
+        self.requested = []
+
+    def download_one_chunk(self, obj_url, offset, size, deadline=None, on_attempt=None):
+        self.requested.append((offset, size))
+        time.sleep(self.delay.get(offset, 0))
+        if offset in self.fail:
+            return (False, 'fail')
+
+        return (True, {'chunk': self.data[offset:offset + size], 'obj_size': len(self.data)})
+
+
+def read_file(filename):
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_download(tmp_path, workers):
+    filename = str(tmp_path / 'obj')
+    core = FakeDownloadApiCore(delay={1024: 0.05})
+    ok, offset, msg = core.download_obj_by_url('url', filename, workers=workers, chunk_size=1024)
+    assert ok and offset == len(DATA)
+    assert read_file(filename) == DATA
+
+
+def test_concurrent_download_failure_truncates_to_contiguous_offset(tmp_path):
+    # 失败的分片最后完成，之后的分片已写入文件，但文件截断到连续下载成功的偏移量处
+    filename = str(tmp_path / 'obj')
+    core = FakeDownloadApiCore(fail={4096}, delay={4096: 0.1})
+    ok, offset, msg = core.download_obj_by_url('url', filename, workers=4, chunk_size=1024)
+    assert not ok
+    assert offset == 4096
+    assert any(o > 4096 for o, _ in core.requested)
+    assert read_file(filename) == DATA[:4096]
+
+
+def test_concurrent_download_resume(tmp_path):
+    filename = str(tmp_path / 'obj')
+    core = FakeDownloadApiCore(fail={4096})
+    ok, committed, msg = core.download_obj_by_url('url', filename, workers=4, chunk_size=1024)
+    assert not ok and committed <= 4096
+    assert read_file(filename) == DATA[:committed]
+
+    core.fail.clear()
+    core.requested.clear()
+    ok, offset, msg = core.download_obj_by_url('url', filename, workers=4, chunk_size=1024, resume=True)
+    assert ok and offset == len(DATA)
+    assert read_file(filename) == DATA
+    assert min(o for o, _ in core.requested) == committed   # 只下载之前未下载的部分
+
+
+def test_download_failure_keeps_downloaded_part(tmp_path):
+    filename = str(tmp_path / 'obj')
+    core = FakeDownloadApiCore(fail={2048})
+    ok, offset, msg = core.download_obj_by_url('url', filename, chunk_size=1024)
+    assert not ok and offset == 2048
+    assert read_file(filename) == DATA[:2048]
+
+    core.fail.clear()
+    ok, offset, msg = core.download_obj_by_url('url', filename, chunk_size=1024, start=offset)
+    assert ok and offset == len(DATA)
+    assert read_file(filename) == DATA
+
+
+def test_download_start_beyond_local_size(tmp_path):
+    # 文件已下载部分的长度小于start时，从文件末尾处继续下载
+    filename = str(tmp_path / 'obj')
+    with open(filename, 'wb') as f:
+        f.write(DATA[:1000])
+
+    core = FakeDownloadApiCore()
+    ok, offset, msg = core.download_obj_by_url('url', filename, chunk_size=1024, start=5000)
+    assert ok and core.requested[0][0] == 1000
+    assert read_file(filename) == DATA
+
+
+def test_reader_read_huge_size():
+    core = FakeDownloadApiCore()
+    with HarborObjectReader('bucket', 'obj', apicore=core, block_size=1024, readahead=0) as f:
+        assert f.read(5) == DATA[:5]
+        assert f.read(2**40) == DATA[5:]
+        assert f.read(2**40) == b''
+
+
+def test_reader_seek_and_read():
+    core = FakeDownloadApiCore()
+    with HarborObjectReader('bucket', 'obj', apicore=core, block_size=1000, readahead=2) as f:
+        f.seek(-100, os.SEEK_END)
+        assert f.read() == DATA[-100:]
+        f.seek(999)
+        assert f.read(1002) == DATA[999:2001]
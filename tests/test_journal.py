@@ -0,0 +1,117 @@
+'''
+上传日志UploadJournal测试
+'''
+import os
+
+import pytest
+
+from pyharbor.api import Directory
+from pyharbor.core import ApiCore
+from pyharbor.journal import UploadJournal
+
+
+@pytest.fixture
+def upload_file(tmp_path):
+    filename = str(tmp_path / 'upload.bin')
+    with open(filename, 'wb') as f:
+        f.write(os.urandom(10240))
+    return filename
+
+
+@pytest.fixture
+def journal(tmp_path):
+    j = UploadJournal(str(tmp_path / 'journal.db'))
+    yield j
+    j.close()
+
+
+def test_offset_round_trip(journal, upload_file):
+    key = journal.make_key('bucket', '/dir/obj', upload_file)
+    assert journal.get_offset(key) == 0
+
+    journal.record(key, 0, 1024)
+    journal.record(key, 1024, 1024)
+    assert journal.get_offset(key) == 2048
+
+
+def test_offset_is_contiguous_from_zero(journal, upload_file):
+    key = journal.make_key('bucket', 'dir/obj', upload_file)
+    journal.record(key, 2048, 1024)     # 并发上传时分片完成的顺序不确定
+    journal.record(key, 4096, 1024)
+    assert journal.get_offset(key) == 0
+
+    journal.record(key, 0, 1024)
+    assert journal.get_offset(key) == 1024
+
+    journal.record(key, 1024, 1024)
+    assert journal.get_offset(key) == 3072
+
+    journal.record(key, 1024, 1024)     # 重传的分片
+    assert journal.get_offset(key) == 3072
+
+
+def test_offset_survives_reopen(tmp_path, upload_file):
+    db_path = str(tmp_path / 'journal.db')
+    journal = UploadJournal(db_path)
+    key = journal.make_key('bucket', 'dir/obj', upload_file)
+    journal.record(key, 0, 4096)
+    journal.close()
+
+    journal = UploadJournal(db_path)
+    try:
+        assert journal.get_offset(journal.make_key('bucket', 'dir/obj', upload_file)) == 4096
+    finally:
+        journal.close()
+
+
+def test_modified_file_starts_over(journal, upload_file):
+    key = journal.make_key('bucket', 'dir/obj', upload_file)
+    journal.record(key, 0, 4096)
+
+    with open(upload_file, 'ab') as f:
+        f.write(b'more')
+    assert journal.get_offset(journal.make_key('bucket', 'dir/obj', upload_file)) == 0
+
+
+def test_remove(journal, upload_file):
+    key = journal.make_key('bucket', 'dir/obj', upload_file)
+    other = journal.make_key('bucket', 'dir/other', upload_file)
+    journal.record(key, 0, 1024)
+    journal.record(other, 0, 1024)
+
+    journal.remove(key)
+    assert journal.get_offset(key) == 0
+    assert journal.get_offset(other) == 1024
+
+
+class FakeUploadApiCore(ApiCore):
+    '''
+    upload_one_chunk()只记录分片，不发送请求；fail为上传失败的分片偏移量集合
+    '''
+    def __init__(self, fail=()):
+        super().__init__()
+        self.fail = set(fail)
+        self.uploaded = []
+
+    def upload_one_chunk(self, obj_url, offset, chunk, **kwargs):
+        if offset in self.fail:
+            return (False, 500, 'fail')
+        self.uploaded.append(offset)
+        return (True, 200, 'ok')
+
+
+def test_put_object_resumes_from_journal(journal, upload_file):
+    core = FakeUploadApiCore(fail={4096})
+    directory = Directory('bucket', 'dir', apicore=core)
+    ok, offset, msg = directory.put_object('obj', upload_file, journal=journal, chunk_size=1024)
+    assert not ok and offset == 4096
+
+    key = journal.make_key('bucket', 'dir/obj', upload_file)
+    assert journal.get_offset(key) == 4096
+
+    core.fail.clear()
+    core.uploaded.clear()
+    ok, offset, msg = directory.put_object('obj', upload_file, journal=journal, chunk_size=1024)
+    assert ok and offset == 10240
+    assert core.uploaded[0] == 4096
+    assert journal.get_offset(key) == 0     # 上传完成后删除记录
@@ -0,0 +1,100 @@
+'''
+分片上传测试，用内存中的假服务器代替网络请求
+
+并发上传时分片完成的顺序不确定，失败时返回的偏移量必须是从start开始连续上传成功的偏移量
+'''
+import io
+import threading
+import time
+
+import pytest
+
+from pyharbor.api import Directory
+from pyharbor.core import ApiCore
+
+
+class FakeUploadApiCore(ApiCore):
+    '''
+    upload_one_chunk()把分片写入内存中的对象，不发送请求
+
+    :param fail: 上传失败的分片偏移量集合
+    :param delay: {分片偏移量: 上传耗时秒数}，用于打乱分片完成的顺序
+    '''
+    def __init__(self, fail=(), delay=None):
+        super().__init__()
+        self.fail = set(fail)
+        self.delay = delay or {}
+        self.data = bytearray()
+        self.uploaded = []
+        self._lock = threading.Lock()
+
+    def upload_one_chunk(self, obj_url, offset, chunk, **kwargs):
+        time.sleep(self.delay.get(offset, 0))
+        if offset in self.fail:
+            return (False, 500, 'fail')
+
+        chunk = bytes(chunk)
+        with self._lock:
+            if len(self.data) < offset + len(chunk):
+                self.data.extend(b'\0' * (offset + len(chunk) - len(self.data)))
+            self.data[offset:offset + len(chunk)] = chunk
+            self.uploaded.append((offset, len(chunk)))
+        return (True, 200, 'ok')
+
+
+DATA = bytes(range(256)) * 40   # 10240字节，分片大小1024时10个分片
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_upload_stream(workers):
+    core = FakeUploadApiCore(delay={0: 0.05})
+    ok, offset, msg = core.upload_stream_by_url('url', DATA, chunk_size=1024, workers=workers)
+    assert ok and offset == len(DATA)
+    assert core.data == DATA
+
+
+def test_concurrent_upload_out_of_order_commits_contiguous_offset():
+    committed = []
+    core = FakeUploadApiCore(delay={0: 0.1, 1024: 0.05})
+    ok, offset, msg = core.upload_stream_by_url('url', DATA, chunk_size=1024, workers=4,
+                                                callback=lambda offset, size: committed.append(offset))
+    assert ok and offset == len(DATA)
+    assert sorted(committed) == list(range(0, len(DATA), 1024))
+    assert committed[0] != 0    # 第一个分片最后完成
+
+
+def test_concurrent_upload_failure_returns_contiguous_offset():
+    # 失败的分片最后完成，之前的分片都已上传成功，之后的分片上传成功也不计入偏移量
+    core = FakeUploadApiCore(fail={3072}, delay={3072: 0.1})
+    ok, offset, msg = core.upload_stream_by_url('url', DATA, chunk_size=1024, workers=4, max_in_flight=10)
+    assert not ok
+    assert offset == 3072
+    assert any(o > 3072 for o, _ in core.uploaded)
+    assert core.data[:offset] == DATA[:offset]
+
+
+def test_concurrent_upload_resume_from_offset():
+    core = FakeUploadApiCore(fail={3072})
+    ok, offset, msg = core.upload_stream_by_url('url', DATA, chunk_size=1024, workers=4)
+    assert not ok and offset <= 3072
+
+    core.fail.clear()
+    ok, offset, msg = core.upload_stream_by_url('url', memoryview(DATA)[offset:], start=offset, chunk_size=1024,
+                                                workers=4)
+    assert ok and offset == len(DATA)
+    assert core.data == DATA
+
+
+@pytest.mark.parametrize('data', [b'', io.BytesIO(b''), iter([b'', b''])])
+def test_empty_upload_sends_one_empty_chunk(data):
+    core = FakeUploadApiCore()
+    ok, offset, msg = Directory('bucket', 'dir', apicore=core).put_stream('obj', data)
+    assert ok and offset == 0
+    assert core.uploaded == [(0, 0)]
+
+
+def test_empty_put_bytes_sends_one_empty_chunk():
+    core = FakeUploadApiCore()
+    ok, offset, msg = Directory('bucket', 'dir', apicore=core).put_bytes('obj', b'', offset=5)
+    assert ok and offset == 5
+    assert core.uploaded == [(5, 0)]